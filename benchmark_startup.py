@@ -0,0 +1,56 @@
+"""
+Startup time benchmark comparing the time to the first frame of a normal start (parsing the PNM file) to a fast start
+using a prebuilt startup artifact. Both starts render and send the first frame as their last measured phase, which for
+the normal start includes casting rays for the first view. Each start is measured in a fresh interpreter, so import
+times are included.
+
+usage: python benchmark_startup.py [map.pnm] [runs]
+"""
+from time import perf_counter
+_process_start_time: float = perf_counter()  # taken before any project import to include import time
+
+from json import dumps, loads
+from os import devnull
+from os.path import isfile
+from subprocess import run
+from sys import argv, executable
+
+
+def run_single_start(file_name: str, artifact_file_name: str | None) -> list[(str, float)]:
+    from lighthouseglobe import LighthouseGlobe
+    from lighthouseoutputsink import LighthouseFileSink
+    phases: list[(str, float)] = [("imports", perf_counter() - _process_start_time)]
+
+    globe: LighthouseGlobe = LighthouseGlobe(frame_rate=30, rotation_rate=45, file_name=file_name,
+                                             max_interpolation_range=3, sinks=[LighthouseFileSink(devnull)],
+                                             startup_artifact_file_name=artifact_file_name,
+                                             enable_keyboard_input=False)
+    phases.extend(globe.get_startup_phases())
+    return phases
+
+
+def run_benchmark(file_name: str, runs: int) -> None:
+    artifact_file_name: str = file_name.rsplit(".", 1)[0] + ".lhga"
+    if not isfile(artifact_file_name):
+        run([executable, "lighthousestartupartifact.py", file_name, artifact_file_name], check=True)
+
+    for mode, artifact in (("normal start", ""), ("fast start", artifact_file_name)):
+        totals: dict[str, float] = {}
+        for _ in range(runs):
+            result = run([executable, __file__, "--child", file_name, artifact], capture_output=True, text=True,
+                         check=True)
+            for name, duration in loads(result.stdout.splitlines()[-1]):
+                totals[name] = totals.get(name, 0.0) + duration
+
+        print("{:s} ({:d} runs, mean per phase):".format(mode, runs))
+        for name, duration in totals.items():
+            print("  {:<20s} {:9.2f} ms".format(name, 1000 * duration / runs))
+        print("  {:<20s} {:9.2f} ms".format("total", 1000 * sum(totals.values()) / runs))
+
+
+if __name__ == '__main__':
+    if len(argv) == 4 and argv[1] == "--child":
+        print(dumps(run_single_start(argv[2], argv[3] if argv[3] else None)))
+    else:
+        run_benchmark(argv[1] if len(argv) > 1 else "earth_contrast.pnm", int(argv[2]) if len(argv) > 2 else 5)
+    exit(0)
@@ -201,6 +201,12 @@ class Sphere3d:
             t: float = s1 if abs(s1) < abs(s2) else s2  # assumes line origin is always outside sphere
             return line.get_scaled(t).get_top()
 
+    def get_discriminant(self, line: Vector3d) -> float:
+        # the sign tells whether the line hits the sphere, the value also tells how close it passes the limb:
+        #   b^2 - 4ac == 4a * (r^2 - distance^2)  with distance being the distance of the line from the center
+        a, b, c = self.__get_abc_intersection_parameters(line)
+        return b * b - 4 * a * c
+
     def get_spherical_coordinates(self, point: Point3d) -> SphericalCoordinates:
         rad_to_deg: float = 180 / pi
         p: Point3d = point - self.center
@@ -0,0 +1,175 @@
+from collections import deque
+from threading import Thread, Condition, Event
+from time import time
+from typing import TYPE_CHECKING
+from lighthouseframe import LighthouseFrame
+from lighthouseoutputsink import LighthouseOutputSink
+
+if TYPE_CHECKING:
+    from lighthousemetrics import LighthouseHistogram  # only needed for annotations, keeps the import of sinks cheap
+
+
+class LighthouseAsyncSink(LighthouseOutputSink):
+    """
+    This class wraps another output sink and sends frames to it from a separate thread, so a slow or stalled receiver
+    never blocks the rendering.
+
+    Frames are held in a bounded queue. If the queue is full, the oldest frame is dropped since a newer frame makes it
+    stale anyway. If sending fails, the sender thread reconnects with exponential backoff while the renderer keeps
+    adding frames to the queue.
+
+    Counters for the queue depth, dropped frames and the time spent reconnecting can be read from any thread. If a
+    histogram is set, the latency from encoding a frame until it was sent is observed for each frame.
+
+    Closing aborts a send that is blocked by a stalled receiver and waits for the sender thread at most close_timeout
+    seconds, so closing never hangs.
+    """
+    __sink: LighthouseOutputSink
+    __queue: deque
+    __condition: Condition
+    __stop_event: Event
+    __thread: Thread | None
+    __backoff_initial: float
+    __backoff_max: float
+    __close_timeout: float
+    __sent_frame_count: int
+    __dropped_frame_count: int
+    __failed_frame_count: int
+    __reconnect_count: int
+    __reconnect_time_total: float
+    __reconnect_time_last: float
+    __connected: bool
+    __send_latency: "LighthouseHistogram | None"
+
+    def __init__(self, sink: LighthouseOutputSink, queue_size: int = 2, backoff_initial: float = 0.1,
+                 backoff_max: float = 10.0, close_timeout: float = 2.0):
+        if queue_size < 1:
+            raise ValueError("Queue size must be at least 1!")
+        self.__sink = sink
+        self.__queue = deque(maxlen=queue_size)
+        self.__condition = Condition()
+        self.__stop_event = Event()
+        self.__thread = None
+        self.__backoff_initial = backoff_initial
+        self.__backoff_max = backoff_max
+        self.__close_timeout = close_timeout
+        self.__sent_frame_count = 0
+        self.__dropped_frame_count = 0
+        self.__failed_frame_count = 0
+        self.__reconnect_count = 0
+        self.__reconnect_time_total = 0.0
+        self.__reconnect_time_last = 0.0
+        self.__connected = False
+        self.__send_latency = None
+
+    def set_send_latency_histogram(self, histogram: "LighthouseHistogram") -> None:
+        self.__send_latency = histogram
+
+    def get_name(self) -> str:
+        return "Async" + self.__sink.get_name()
+
+    def get_queue_depth(self) -> int:
+        return len(self.__queue)
+
+    def get_sent_frame_count(self) -> int:
+        return self.__sent_frame_count
+
+    def get_dropped_frame_count(self) -> int:
+        return self.__dropped_frame_count
+
+    def get_failed_frame_count(self) -> int:
+        return self.__failed_frame_count
+
+    def get_reconnect_count(self) -> int:
+        return self.__reconnect_count
+
+    def get_reconnect_time_total(self) -> float:
+        return self.__reconnect_time_total
+
+    def get_reconnect_time_last(self) -> float:
+        return self.__reconnect_time_last
+
+    def is_connected(self) -> bool:
+        return self.__connected
+
+    def open(self) -> None:
+        if self.__thread is not None:
+            return
+        self.__stop_event.clear()
+        self.__thread = Thread(target=self.__run_sender, name=self.get_name(), daemon=True)
+        self.__thread.start()
+
+    def reconnect(self) -> None:
+        self.__connected = False  # sender thread reconnects before sending the next frame
+
+    def abort(self) -> None:
+        self.__sink.abort()
+
+    def send_frame(self, frame: LighthouseFrame) -> None:
+        with self.__condition:
+            if len(self.__queue) == self.__queue.maxlen:
+                self.__dropped_frame_count += 1  # appending to a full deque discards its oldest entry
+            self.__queue.append(frame)
+            self.__condition.notify()
+
+    def close(self) -> None:
+        if self.__thread is None:
+            return
+        self.__stop_event.set()
+        with self.__condition:
+            self.__condition.notify()
+        self.__sink.abort()
+        self.__thread.join(self.__close_timeout)
+        if self.__thread.is_alive():
+            print("[WARN]", self.get_name(), "sender thread did not stop within {:.1f}s".format(self.__close_timeout))
+        self.__thread = None
+        self.__queue.clear()
+        self.__sink.close()
+        self.__connected = False
+
+    def __run_sender(self) -> None:
+        first_connect: bool = True
+        while not self.__stop_event.is_set():
+            if not self.__connected:
+                self.__connect_with_backoff(first_connect)
+                first_connect = False
+                continue
+
+            with self.__condition:
+                while not self.__queue and not self.__stop_event.is_set():
+                    self.__condition.wait()
+                if self.__stop_event.is_set():
+                    break
+                frame: LighthouseFrame = self.__queue.popleft()
+
+            try:
+                self.__sink.send_frame(frame)
+                self.__sent_frame_count += 1
+                if self.__send_latency is not None:
+                    self.__send_latency.observe(time() - frame.get_timestamp())
+            except (OSError, ConnectionError) as e:
+                print("[WARN]", self.get_name(), "failed to send frame", frame.get_index(), ":", e)
+                self.__failed_frame_count += 1
+                self.__connected = False
+
+    def __connect_with_backoff(self, first_connect: bool) -> None:
+        start_time: float = time()
+        delay: float = self.__backoff_initial
+        while not self.__stop_event.is_set():
+            try:
+                if first_connect:
+                    self.__sink.open()
+                else:
+                    self.__sink.reconnect()
+                self.__connected = True
+                break
+            except (OSError, ConnectionError) as e:
+                print("[WARN]", self.get_name(), "could not connect, retrying in {:.1f}s:".format(delay), e)
+                self.__stop_event.wait(delay)
+                delay = min(delay * 2, self.__backoff_max)
+
+        if not first_connect and self.__connected:
+            self.__reconnect_count += 1
+            self.__reconnect_time_last = time() - start_time
+            self.__reconnect_time_total += self.__reconnect_time_last
+            print("[INFO]", self.get_name(), "reconnected after {:.3f}s".format(self.__reconnect_time_last))
@@ -0,0 +1,110 @@
+from bisect import bisect_right
+from json import load
+from typing import TextIO
+from geometry import EulerAngles
+
+
+class LighthouseKeyframe:
+    """
+    A single keyframe of a camera path: the camera angles, the rotation rate of the sphere and the map shown at the
+    given time (in seconds from the start of the path).
+    """
+    time: float
+    angles: EulerAngles
+    rotation_rate: float
+    file_name: str
+
+    def __init__(self, time: float, angles: EulerAngles, rotation_rate: float, file_name: str):
+        self.time = time
+        self.angles = angles
+        self.rotation_rate = rotation_rate
+        self.file_name = file_name
+
+
+class LighthouseCameraPath:
+    """
+    This class describes a scripted camera tour as a list of keyframes, which is interpolated over time.
+
+    Camera angles and rotation rate are interpolated linearly between two keyframes, angles always take the shorter way
+    around the circle. The rotation of the sphere is the integral of the rotation rate, so changing the rate between
+    keyframes speeds up or slows down the spin smoothly. The map switches at the keyframe that names a new map.
+
+    A path can be loaded from a JSON file holding a list of keyframes like
+    {"time": 0.0, "angles": [270.0, 180.0, 0.0], "rotation_rate": 45.0, "file_name": "earth_contrast.pnm"}.
+    """
+    __keyframes: list[LighthouseKeyframe]
+    __times: list[float]
+    __rotations: list[float]
+    __loop: bool
+
+    def __init__(self, keyframes: list[LighthouseKeyframe], loop: bool = False):
+        if not keyframes:
+            raise ValueError("Camera path needs at least one keyframe!")
+        self.__keyframes = sorted(keyframes, key=lambda keyframe: keyframe.time)
+        if self.__keyframes[0].time != 0.0:
+            raise ValueError("First keyframe of a camera path must be at time 0!")
+        self.__times = [keyframe.time for keyframe in self.__keyframes]
+        self.__loop = loop
+
+        # rotation of the sphere at each keyframe, integrating the linearly changing rate (trapezoidal rule is exact)
+        self.__rotations = [0.0]
+        for previous, current in zip(self.__keyframes, self.__keyframes[1:]):
+            duration: float = current.time - previous.time
+            self.__rotations.append(self.__rotations[-1] + 0.5 * (previous.rotation_rate + current.rotation_rate) *
+                                    duration)
+
+    @staticmethod
+    def load(file_name: str, loop: bool = False) -> "LighthouseCameraPath":
+        file: TextIO = open(file_name, "rt")
+        entries: list[dict] = load(file)
+        file.close()
+
+        keyframes: list[LighthouseKeyframe] = []
+        for entry in entries:
+            keyframes.append(LighthouseKeyframe(float(entry["time"]), EulerAngles(*entry["angles"]),
+                                                float(entry["rotation_rate"]), entry["file_name"]))
+        return LighthouseCameraPath(keyframes, loop)
+
+    def get_duration(self) -> float:
+        return self.__times[-1]
+
+    def get_file_names(self) -> list[str]:
+        return list(dict.fromkeys(keyframe.file_name for keyframe in self.__keyframes))
+
+    def is_finished_at(self, time: float) -> bool:
+        return not self.__loop and time > self.get_duration()
+
+    def get_view_at(self, time: float) -> (EulerAngles, float, str):
+        """
+        Gets the interpolated view at the given time.
+
+        :param time: Time in seconds since the start of the path
+        :return: Camera angles, rotation of the sphere in degrees [0, 360) and file name of the map
+        """
+        if self.__loop and self.get_duration() > 0:
+            time = time % self.get_duration()
+        time = min(max(time, 0.0), self.get_duration())
+
+        index: int = bisect_right(self.__times, time) - 1
+        start: LighthouseKeyframe = self.__keyframes[index]
+        if index == len(self.__keyframes) - 1:
+            return EulerAngles(start.angles.alpha, start.angles.beta, start.angles.gamma), \
+                self.__rotations[index] % 360, start.file_name
+
+        end: LighthouseKeyframe = self.__keyframes[index + 1]
+        dt: float = time - start.time
+        fraction: float = dt / (end.time - start.time)
+        angles: EulerAngles = EulerAngles(LighthouseCameraPath.__interpolate_angle(start.angles.alpha,
+                                                                                   end.angles.alpha, fraction),
+                                          LighthouseCameraPath.__interpolate_angle(start.angles.beta,
+                                                                                   end.angles.beta, fraction),
+                                          LighthouseCameraPath.__interpolate_angle(start.angles.gamma,
+                                                                                   end.angles.gamma, fraction))
+        rate: float = start.rotation_rate + (end.rotation_rate - start.rotation_rate) * fraction
+        rotation: float = self.__rotations[index] + 0.5 * (start.rotation_rate + rate) * dt
+        return angles, rotation % 360, start.file_name
+
+    @staticmethod
+    def __interpolate_angle(start: float, end: float, fraction: float) -> float:
+        delta: float = ((end - start + 180) % 360) - 180  # shortest way around the circle
+        return (start + delta * fraction) % 360
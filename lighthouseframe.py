@@ -0,0 +1,49 @@
+from time import time
+from numpy import ndarray, asarray, frombuffer, uint8
+from lighthouseimage import LighthouseImage
+
+
+class LighthouseFrame:
+    """
+    This class holds a single rendered frame in its encoded form, i.e. as packed 8-bit rgb bytes in row-major order.
+
+    A frame is encoded exactly once after rendering and then handed to every output sink. Sinks that need a different
+    representation (e.g. the nested array used by the Pyghthouse api) derive it from the encoded bytes, which is cheap
+    compared to rendering or encoding again.
+    """
+    __data: bytes
+    __dim_y: int
+    __dim_x: int
+    __index: int
+    __timestamp: float
+
+    def __init__(self, data: bytes, dim_y: int, dim_x: int, index: int, timestamp: float):
+        if len(data) != dim_y * dim_x * 3:
+            raise ValueError("Frame data size {:d} does not match dimensions ({:d}, {:d})!".format(len(data), dim_y,
+                                                                                                  dim_x))
+        self.__data = data
+        self.__dim_y = dim_y
+        self.__dim_x = dim_x
+        self.__index = index
+        self.__timestamp = timestamp
+
+    @staticmethod
+    def encode(image: LighthouseImage, index: int) -> "LighthouseFrame":
+        rgb: ndarray = asarray(image.get(), dtype=uint8)
+        return LighthouseFrame(rgb.tobytes(), rgb.shape[0], rgb.shape[1], index, time())
+
+    def get_data(self) -> bytes:
+        return self.__data
+
+    def get_dimensions(self) -> (int, int):
+        return self.__dim_y, self.__dim_x
+
+    def get_index(self) -> int:
+        return self.__index
+
+    def get_timestamp(self) -> float:
+        return self.__timestamp
+
+    def get_rgb_array(self) -> ndarray:
+        # read-only view onto the encoded bytes, no copy is made
+        return frombuffer(self.__data, dtype=uint8).reshape((self.__dim_y, self.__dim_x, 3))
@@ -1,34 +1,201 @@
-from time import sleep, time
+from time import sleep, time, perf_counter
 from datetime import datetime
+from typing import TYPE_CHECKING
 from lighthousestate import LighthouseState
 from lighthouseinputcontroller import LighthouseInputController
 from lighthouseoutputcontroller import LighthouseOutputController
+from lighthouseoutputsink import LighthouseOutputSink, LighthousePyghthouseSink
+from lighthouseasyncsink import LighthouseAsyncSink
+from lighthousestartupartifact import LighthouseStartupArtifact
+from lighthousequalitygovernor import LighthouseQualityGovernor
+from lighthousescene import LighthouseScene
+from lighthousemetrics import LighthouseMetrics, LighthouseMetricsServer, LighthouseMetricsFileWriter, \
+    LighthouseCounter, LighthouseHistogram
+
+if TYPE_CHECKING:
+    # only needed for annotations, shared memory and process pools are imported when a camera path is played
+    from lighthousemapstore import LighthouseMapStore
+    from lighthousecamerapath import LighthouseCameraPath
 
 
 class LighthouseGlobe:
     """
     This is the main class of the project. Combines all other functionality contained in the two controller classes
-    which can communicate via the state class. Also handles the timing of a heartbeat signal and secures disconnecting
-    from the api on any exception.
+    which can communicate via the state class. Also handles the frame timing and a heartbeat signal and secures
+    disconnecting from all output sinks on any exception.
+
+    If no output sinks are given, frames are sent to the Pyghthouse api using the credentials from login.py.
+
+    For a fast start (e.g. after a crash or a deploy), a startup artifact built by lighthousestartupartifact.py can be
+    given. The map and view tables are then memory mapped from the artifact. With or without artifact, the first frame
+    is sent before the keyboard input is set up. The duration of each startup phase is recorded and can be read for
+    benchmarking.
+
+    With adaptive quality enabled, a quality governor lowers the maximum interpolation range of the map whenever frames
+    take longer to render than the target frame rate allows and raises it again once there is enough headroom.
+
+    Several globes on the same host can share one copy of their map by passing a map store.
+
+    Metrics (achieved frame rate, render and send latency, late and dropped frames, cache hits, map memory and
+    reconnects) are always collected and can be served in Prometheus format on a local port and/or written to a JSON
+    file periodically.
+
+    A camera path given on creation is played first, with frames rendered ahead on a pool of worker processes. After
+    the path has finished, the globe continues with the live view controlled by the keyboard.
+
+    Instead of the single sphere showing the map from file_name, a scene with several bodies (e.g. a planet and an
+    orbiting moon) can be rendered.
+
+    With anti_aliasing_samples above 1, each pixel on the limb of the sphere is supersampled with that many samples
+    along each axis. This smooths the edge of the sphere for a fraction of the cost of supersampling the whole screen.
+
+    Incremental rendering (enabled by default) only computes the color of pixels that show a different part of the map
+    than in the previous frame, so the work per frame grows with the motion instead of with the screen size.
     """
-    __ic: LighthouseInputController
+    __ic: LighthouseInputController | None
     __oc: LighthouseOutputController
     __state: LighthouseState
+    __governor: LighthouseQualityGovernor | None
+    __metrics: LighthouseMetrics
+    __metrics_server: LighthouseMetricsServer | None
+    __metrics_file_writer: LighthouseMetricsFileWriter | None
+    __frame_counter: LighthouseCounter
+    __late_frame_counter: LighthouseCounter
+    __render_time_histogram: LighthouseHistogram
+    __frame_interval_average: float
+    __last_frame_time: float
 
     __timer_start_time: float
     __last_update_time: float
+    __startup_phase_start_time: float
+    __startup_phases: list[(str, float)]
+
+    def __init__(self, frame_rate: int, rotation_rate: int, file_name: str, max_interpolation_range: int,
+                 sinks: list[LighthouseOutputSink] | None = None, startup_artifact_file_name: str | None = None,
+                 enable_keyboard_input: bool = True, adaptive_quality: bool = True,
+                 map_store: "LighthouseMapStore | None" = None, metrics_port: int | None = None,
+                 metrics_file_name: str | None = None, camera_path: "LighthouseCameraPath | None" = None,
+                 camera_path_worker_count: int = 2, scene: LighthouseScene | None = None,
+                 anti_aliasing_samples: int = 1, incremental_rendering: bool = True):
+        self.__startup_phases = []
+        self.__startup_phase_start_time = perf_counter()
 
-    def __init__(self, frame_rate: int, rotation_rate: int, file_name: str, max_interpolation_range: int):
         self.__state = LighthouseState(frame_rate, rotation_rate, rotation_rate_max=90.0)
-        self.__ic = LighthouseInputController(self.__state)
-        self.__oc = LighthouseOutputController(self.__state, file_name, max_interpolation_range)
+        if sinks is None:
+            sinks = [LighthouseGlobe.__create_default_sink(frame_rate)]
+        self.__record_startup_phase("state and sinks")
+
+        startup_artifact: LighthouseStartupArtifact | None = None
+        if startup_artifact_file_name is not None:
+            try:
+                startup_artifact = LighthouseStartupArtifact(startup_artifact_file_name)
+            except (OSError, ValueError) as e:
+                print("[WARN] could not load startup artifact, falling back to normal start:", e)
+            self.__record_startup_phase("startup artifact")
+
+        self.__oc = LighthouseOutputController(self.__state, file_name, max_interpolation_range, sinks,
+                                               startup_artifact, map_store, scene=scene)
+        self.__oc.set_anti_aliasing_samples(anti_aliasing_samples)
+        self.__oc.set_incremental_rendering(incremental_rendering)
+        self.__governor = None
+        if adaptive_quality:
+            self.__governor = LighthouseQualityGovernor(self.__state, self.__oc.set_maximum_interpolation_range,
+                                                        min_level=0, max_level=max_interpolation_range)
+        self.__setup_metrics(metrics_port, metrics_file_name)
+        self.__record_startup_phase("output controller")
+
+        if camera_path is not None:
+            from lighthousemapstore import LighthouseMapStore
+            from lighthousepathplayer import LighthousePathPlayer
+            path_map_store: LighthouseMapStore = map_store if map_store is not None else LighthouseMapStore()
+            self.__oc.play_camera_path(LighthousePathPlayer(camera_path, frame_rate, max_interpolation_range,
+                                                            path_map_store, worker_count=camera_path_worker_count))
+            self.__record_startup_phase("camera path workers")
+
+        self.__oc.start_frame_rendering()
+        self.__oc.draw_next_frame()
+        self.__record_startup_phase("first frame")
+
+        self.__ic = LighthouseInputController(self.__state) if enable_keyboard_input else None
+        self.__record_startup_phase("input controller")
 
         self.__loop_counter = 0
         self.__last_update_time = time()
+        self.__last_frame_time = perf_counter()
 
     def __del__(self):
-        self.__oc.stop_frame_rendering()
         self.__oc.disconnect()
+        self.__oc.release_map()
+
+    @staticmethod
+    def __create_default_sink(frame_rate: int) -> LighthouseOutputSink:
+        # Values for username and token must be provided in login.py
+        from login import username, token
+        return LighthouseAsyncSink(LighthousePyghthouseSink(username, token, frame_rate))
+
+    def __setup_metrics(self, metrics_port: int | None, metrics_file_name: str | None) -> None:
+        self.__metrics = LighthouseMetrics()
+        self.__frame_counter = self.__metrics.add_counter("lighthouse_frames_total", "Number of rendered frames")
+        self.__late_frame_counter = self.__metrics.add_counter("lighthouse_late_frames_total",
+                                                               "Number of frames that exceeded the frame budget")
+        latency_buckets: list[float] = [0.001, 0.002, 0.005, 0.01, 0.02, 0.033, 0.05, 0.1, 0.25, 0.5, 1.0]
+        self.__render_time_histogram = self.__metrics.add_histogram("lighthouse_render_seconds",
+                                                                    "Time to render and encode a frame",
+                                                                    latency_buckets)
+        send_latency_histogram: LighthouseHistogram = self.__metrics.add_histogram(
+            "lighthouse_send_latency_seconds", "Time from encoding a frame until it was sent", latency_buckets)
+        self.__frame_interval_average = 1.0 / self.__state.get_target_frame_rate()
+
+        async_sinks: list[LighthouseAsyncSink] = [sink for sink in self.__oc.get_sinks()
+                                                  if isinstance(sink, LighthouseAsyncSink)]
+        for sink in async_sinks:
+            sink.set_send_latency_histogram(send_latency_histogram)
+
+        self.__metrics.add_collector("lighthouse_fps", "gauge", "Achieved frame rate",
+                                     lambda: 1.0 / self.__frame_interval_average)
+        self.__metrics.add_collector("lighthouse_target_fps", "gauge", "Target frame rate",
+                                     self.__state.get_target_frame_rate)
+        self.__metrics.add_collector("lighthouse_dropped_frames_total", "counter",
+                                     "Number of frames dropped by the send queues",
+                                     lambda: sum(sink.get_dropped_frame_count() for sink in async_sinks))
+        self.__metrics.add_collector("lighthouse_send_queue_depth", "gauge", "Number of frames waiting to be sent",
+                                     lambda: sum(sink.get_queue_depth() for sink in async_sinks))
+        self.__metrics.add_collector("lighthouse_reconnects_total", "counter", "Number of reconnects of all sinks",
+                                     lambda: sum(sink.get_reconnect_count() for sink in async_sinks))
+        self.__metrics.add_collector("lighthouse_reconnect_seconds_total", "counter", "Time spent reconnecting",
+                                     lambda: sum(sink.get_reconnect_time_total() for sink in async_sinks))
+        self.__metrics.add_collector("lighthouse_view_table_cache_hits_total", "counter", "View table cache hits",
+                                     lambda: self.__oc.get_view_table_cache().get_hit_count())
+        self.__metrics.add_collector("lighthouse_view_table_cache_misses_total", "counter", "View table cache misses",
+                                     lambda: self.__oc.get_view_table_cache().get_miss_count())
+        self.__metrics.add_collector("lighthouse_map_memory_bytes", "gauge", "Memory used by the map data",
+                                     self.__oc.get_map_memory_usage)
+        self.__metrics.add_collector("lighthouse_computed_pixels_total", "counter",
+                                     "Number of pixels whose color was computed from the map instead of copied",
+                                     self.__oc.get_computed_pixel_count)
+        if self.__governor is not None:
+            self.__metrics.add_collector("lighthouse_quality_level", "gauge", "Current quality level",
+                                         self.__governor.get_level)
+
+        self.__metrics_server = None
+        if metrics_port is not None:
+            self.__metrics_server = LighthouseMetricsServer(self.__metrics, metrics_port)
+            self.__metrics_server.start()
+        self.__metrics_file_writer = None
+        if metrics_file_name is not None:
+            self.__metrics_file_writer = LighthouseMetricsFileWriter(self.__metrics, metrics_file_name)
+            self.__metrics_file_writer.start()
+
+    def get_metrics(self) -> LighthouseMetrics:
+        return self.__metrics
+
+    def __record_startup_phase(self, name: str) -> None:
+        now: float = perf_counter()
+        self.__startup_phases.append((name, now - self.__startup_phase_start_time))
+        self.__startup_phase_start_time = now
+
+    def get_startup_phases(self) -> list[(str, float)]:
+        return self.__startup_phases
 
     def __start_timer(self) -> None:
         self.__timer_start_time = time()
@@ -39,7 +206,10 @@ class LighthouseGlobe:
 
         self.__last_update_time = time() + sleep_time
 
-        sleep(sleep_time if sleep_time > 0 else 0)
+        if sleep_time > 0:
+            sleep(sleep_time)
+        else:
+            self.__late_frame_counter.increment()
         # Debug section
         # dt_str: str = " dt=" + "{:+10.5f}s".format(delta_time)
         # st_str: str = " st=" + "{:+10.5f}s".format(sleep_time)
@@ -50,6 +220,23 @@ class LighthouseGlobe:
         delta_time: float = time() - self.__timer_start_time
         return "{:.3f}s".format(delta_time).rjust(12)
 
+    def __draw_next_frame(self) -> None:
+        # path frames are rendered ahead by the path player with its own interpolation range, so their time (mostly
+        # waiting for the workers) says nothing about the quality level of the live view
+        playing_camera_path: bool = self.__oc.is_playing_camera_path()
+        render_start_time: float = perf_counter()
+        self.__oc.draw_next_frame()
+        render_end_time: float = perf_counter()
+        render_time: float = render_end_time - render_start_time
+        if self.__governor is not None and not playing_camera_path:
+            self.__governor.report_render_time(render_time)
+
+        self.__frame_counter.increment()
+        self.__render_time_histogram.observe(render_time)
+        self.__frame_interval_average += 0.05 * (render_start_time - self.__last_frame_time -
+                                                 self.__frame_interval_average)
+        self.__last_frame_time = render_start_time
+
     def run_main_loop(self) -> None:
         heartbeat_interval_seconds: int = 15
         loop_counter: int = 0
@@ -63,20 +250,30 @@ class LighthouseGlobe:
                     print("Heartbeat of main loop at", timestamp, "after ", self.get_elapsed_time_string())
                     loop_counter = 0
                 loop_counter += 1
+                self.__draw_next_frame()
                 self.__sleep_rest_of_cycle()
         except BaseException as e:
             raise e
         finally:
-            self.__oc.stop_frame_rendering()
             self.__oc.disconnect()
+            self.__oc.release_map()
+            if self.__metrics_server is not None:
+                self.__metrics_server.stop()
+            if self.__metrics_file_writer is not None:
+                self.__metrics_file_writer.stop()
 
 
 # stole this if-statement from the Pyghthouse examples
 if __name__ == '__main__':
+    from os.path import isfile
+    # build with: python lighthousestartupartifact.py earth_contrast.pnm earth_contrast.lhga
+    artifact_file_name: str = "earth_contrast.lhga"
     lg: LighthouseGlobe = LighthouseGlobe(frame_rate=30,
                                           rotation_rate=45,
                                           file_name="earth_contrast.pnm",
-                                          max_interpolation_range=3)
+                                          max_interpolation_range=3,
+                                          startup_artifact_file_name=artifact_file_name if isfile(
+                                              artifact_file_name) else None)
 
     lg.run_main_loop()
 
@@ -1,4 +1,3 @@
-from keyboard import on_press
 from geometry import EulerAngles
 from lighthousestate import LighthouseState
 
@@ -8,6 +7,9 @@ class LighthouseInputController:
     This class handles the input from the user and modifies the shared state class accordingly.
 
     NOTE: keyboard input requires sudo privileges on linux.
+
+    The keyboard module is only imported when the controller is created, since importing it already installs its
+    hooks and takes a noticeable part of the startup time.
     """
     __state: LighthouseState
     __next_polar_view_is_north: bool
@@ -15,6 +17,7 @@ class LighthouseInputController:
     def __init__(self, state: LighthouseState):
         self.__state = state
         self.__next_polar_view_is_north = True
+        from keyboard import on_press
         on_press(self.__on_key_press)
 
     def __on_key_press(self, event) -> None:
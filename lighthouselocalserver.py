@@ -0,0 +1,153 @@
+from socket import socket, create_server, SHUT_RDWR
+from struct import unpack
+from threading import Thread, Lock, Timer
+from time import sleep
+from lighthouseframe import LighthouseFrame
+
+
+class LighthouseLocalServer:
+    """
+    This class is a local stand-in for the Lighthouse server. It accepts connections from LighthouseServerSink objects
+    and keeps the most recently received frame as well as a frame counter, which makes it usable for testing and for
+    running the globe without access to the real Lighthouse.
+
+    Frames are received as a 4 byte big-endian length followed by the encoded frame data.
+
+    To test the behaviour of senders with a bad connection, the server can simulate a latency per received frame,
+    drop all current connections or go offline completely for a given duration.
+    """
+    __server: socket
+    __host: str
+    __port: int
+    __latency: float
+    __connections: list[socket]
+    __dim_y: int
+    __dim_x: int
+    __lock: Lock
+    __frame_count: int
+    __last_frame: LighthouseFrame | None
+    __running: bool
+    __accept_thread: Thread | None
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 9000, dim_y: int = 14, dim_x: int = 28,
+                 latency: float = 0.0):
+        self.__server = create_server((host, port))
+        self.__host = host
+        self.__port = self.__server.getsockname()[1]  # resolves port 0 to the port chosen by the os
+        self.__latency = latency
+        self.__connections = []
+        self.__dim_y = dim_y
+        self.__dim_x = dim_x
+        self.__lock = Lock()
+        self.__frame_count = 0
+        self.__last_frame = None
+        self.__running = False
+        self.__accept_thread = None
+
+    def get_port(self) -> int:
+        return self.__port
+
+    def set_latency(self, latency: float) -> None:
+        self.__latency = latency
+
+    def get_frame_count(self) -> int:
+        with self.__lock:
+            return self.__frame_count
+
+    def get_last_frame(self) -> LighthouseFrame | None:
+        with self.__lock:
+            return self.__last_frame
+
+    def start(self) -> None:
+        self.__running = True
+        self.__accept_thread = Thread(target=self.__accept_connections, daemon=True)
+        self.__accept_thread.start()
+
+    def stop(self) -> None:
+        self.__running = False
+        LighthouseLocalServer.__shutdown_socket(self.__server)
+        self.drop_connections()
+
+    def drop_connections(self) -> None:
+        with self.__lock:
+            connections: list[socket] = self.__connections
+            self.__connections = []
+        for connection in connections:
+            LighthouseLocalServer.__shutdown_socket(connection)
+
+    def simulate_outage(self, duration: float) -> None:
+        # closing the server socket ends the accept thread, new connection attempts are refused until restart
+        LighthouseLocalServer.__shutdown_socket(self.__server)
+        self.drop_connections()
+        if self.__accept_thread is not None:
+            self.__accept_thread.join()
+        timer: Timer = Timer(duration, self.__restart)
+        timer.daemon = True
+        timer.start()
+
+    def __restart(self) -> None:
+        if not self.__running:
+            return
+        self.__server = create_server((self.__host, self.__port))
+        self.start()
+
+    def __accept_connections(self) -> None:
+        while self.__running:
+            try:
+                connection, _ = self.__server.accept()
+            except OSError:
+                break  # server socket was closed
+            with self.__lock:
+                self.__connections.append(connection)
+            Thread(target=self.__receive_frames, args=(connection,), daemon=True).start()
+
+    def __receive_frames(self, connection: socket) -> None:
+        with connection:
+            while self.__running:
+                header: bytes | None = LighthouseLocalServer.__receive_exactly(connection, 4)
+                if header is None:
+                    break
+                data: bytes | None = LighthouseLocalServer.__receive_exactly(connection, unpack(">I", header)[0])
+                if data is None:
+                    break
+                if self.__latency > 0:
+                    sleep(self.__latency)
+                with self.__lock:
+                    self.__last_frame = LighthouseFrame(data, self.__dim_y, self.__dim_x, self.__frame_count, 0.0)
+                    self.__frame_count += 1
+
+    @staticmethod
+    def __shutdown_socket(sock: socket) -> None:
+        # a plain close() does not wake up threads blocked in accept() or recv() on this socket
+        try:
+            sock.shutdown(SHUT_RDWR)
+        except OSError:
+            pass  # socket was not connected or is already shut down
+        sock.close()
+
+    @staticmethod
+    def __receive_exactly(connection: socket, size: int) -> bytes | None:
+        chunks: list[bytes] = []
+        remaining: int = size
+        while remaining > 0:
+            try:
+                chunk: bytes = connection.recv(remaining)
+            except OSError:
+                return None
+            if not chunk:
+                return None  # peer closed the connection
+            chunks.append(chunk)
+            remaining -= len(chunk)
+        return b"".join(chunks)
+
+
+if __name__ == '__main__':
+    server: LighthouseLocalServer = LighthouseLocalServer()
+    server.start()
+    print("[INFO] local server listening on port", server.get_port())
+    try:
+        while True:
+            sleep(15)
+            print("[INFO] received", server.get_frame_count(), "frames so far")
+    except KeyboardInterrupt:
+        server.stop()
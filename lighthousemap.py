@@ -1,15 +1,27 @@
 from re import match, compile
 from math import floor
-from numpy import ndarray, zeros
-from typing.io import TextIO
+from numpy import ndarray, zeros, empty, roll, uint8, uint16
+from typing import TextIO
 
 
 class LighthouseMap:
     """
     This class stores the map data that is projected onto the sphere in the renderer. It also handles the loading of a
     pnm file to provide the map data. Currently only supports PNM version P3.
+
+    Map data is stored as uint8, which is all the PNM color values need. Alternatively, already parsed map data (e.g.
+    memory mapped from a startup artifact or attached from a shared map store) can be used via load_array.
+
+    To allow rotations by fractions of a map pixel, the map is kept as a bank of phase-shifted copies with the shape
+    (phases, y, x, 3). Copy p is shifted by p/phases pixels in longitude via linear interpolation at load time, so a
+    fractional longitude is sampled by picking the nearest phase and then doing a plain integer lookup. The bank
+    multiplies the memory of the map by the number of phases: with the default of 4 phases, a 360x180 map takes 777,600
+    bytes, half of what a single int64 copy used to take.
     """
+    __default_phase_count: int = 4
+
     __map: ndarray
+    __phase_count: int
     __dim_x: int
     __dim_y: int
     __res: float
@@ -24,15 +36,46 @@ class LighthouseMap:
         self.__map = ndarray([])
         self.__max_interp_range = 0
 
-    def load_image(self, file_name: str) -> None:
+    def load_image(self, file_name: str, phase_count: int = __default_phase_count) -> None:
         file: TextIO = open(file_name, "rt")
         data: list[str] = file.read().splitlines()
 
         self.__process_and_remove_header(data)
         self.__load_data_to_map(data)
+        self.__map = LighthouseMap.__build_phase_bank(self.__map, phase_count)
+        self.__phase_count = phase_count
 
         file.close()
 
+    def load_array(self, rgb_map: ndarray, phase_count: int = __default_phase_count) -> None:
+        # accepts a plain map (y, x, 3) or an already built phase bank (phases, y, x, 3), which keeps its phase count
+        if rgb_map.ndim == 3 and rgb_map.shape[2] == 3:
+            rgb_map = LighthouseMap.__build_phase_bank(rgb_map, phase_count)
+        elif rgb_map.ndim != 4 or rgb_map.shape[3] != 3:
+            raise ValueError("Map array must have the shape (y, x, 3) or (phases, y, x, 3)!")
+        self.__phase_count = rgb_map.shape[0]
+        self.__dim_y = rgb_map.shape[1]
+        self.__dim_x = rgb_map.shape[2]
+        self.__res = 180.0 / self.__dim_y
+        self.__map = rgb_map
+        self.__max_interp_range = self.__dim_x
+
+    def get_array(self) -> ndarray:
+        return self.__map
+
+    @staticmethod
+    def __build_phase_bank(rgb_map: ndarray, phase_count: int) -> ndarray:
+        if phase_count < 1:
+            raise ValueError("Phase count must be at least 1!")
+        bank: ndarray = empty((phase_count,) + rgb_map.shape, dtype=uint8)
+        current: ndarray = rgb_map.astype(uint16)
+        following: ndarray = roll(current, -1, axis=1)  # neighbour in longitude, wraps around the day change meridian
+        for phase in range(phase_count):
+            # rounded linear interpolation between a map pixel and its eastern neighbour
+            mixed: ndarray = (current * (phase_count - phase) + following * phase + phase_count // 2) // phase_count
+            bank[phase] = mixed.astype(uint8)
+        return bank
+
     def set_maximum_interpolation_range(self, max_interp_range: int) -> None:
         self.__max_interp_range = max_interp_range
 
@@ -114,26 +157,25 @@ class LighthouseMap:
                 self.__dim_x = x
                 self.__dim_y = y
                 self.__res = 180.0 / y  # == 360 / x
-                self.__map = zeros((self.__dim_y, self.__dim_x, 3), dtype=int)
+                self.__map = zeros((self.__dim_y, self.__dim_x, 3), dtype=uint8)
                 self.__max_interp_range = x  # higher interpolation is useless (wraps around for same values)
                 print("[DEBUG] map dimensions: (x = {:3d}, y = {:3d})".format(x, y))
 
     def get_color_from_coordinate(self, lat: float, lon: float) -> (int, int, int):
+        return self.get_color_from_window_index(self.get_window_index(lat, lon))
+
+    def get_window_index(self, lat: float, lon: float) -> (int, int, int):
+        """
+        Gets the index of the window of map pixels that is averaged for the color at the given coordinate. Coordinates
+        with the same window index have the same color as long as the maximum interpolation range does not change.
+
+        :return: Phase, y and x of the map pixel at the center of the window
+        """
         if not ((lat >= -90) and (lat <= 90)):
             raise ValueError("Latitude must be in range [-90, 90]!")
         if not ((lon >= -180) and (lon <= 180)):
             raise ValueError("Latitude must be in range [-180, 180]!")
 
-        # interpolation radius is determined from resolution, value is rounded since pixel coordinates are also indices.
-        # resolution of Pyghthouse image is 180/14 == 360/28 which is the target value after interpolation (ca. 12,86).
-        delta: int = floor((180/14) / self.__res)  # range for interpolation
-        if delta > self.__max_interp_range:
-            delta = self.__max_interp_range  # maximum range for interpolation
-
-        r: int = 0
-        g: int = 0
-        b: int = 0
-
         # resolution stores the degrees per pixel in the map -> use to calculate transformation:
         #   coordinates:
         #        map pixels      map-oriented pseudo-spherical    global spherical
@@ -151,8 +193,29 @@ class LighthouseMap:
         lon = 180.0 + lon
 
         # lat/lon are now in map-oriented pseudo-spherical coordinates, transform to map pixels via resolution.
-        x: int = int(round(lon / self.__res))
+        # the fractional part of x selects the closest phase-shifted copy of the map.
+        x_exact: float = lon / self.__res
+        x: int = floor(x_exact)
+        phase: int = round((x_exact - x) * self.__phase_count)
+        if phase == self.__phase_count:
+            x += 1
+            phase = 0
         y: int = int(round(lat / self.__res))
+        return phase, y, x
+
+    def get_color_from_window_index(self, window_index: (int, int, int)) -> (int, int, int):
+        phase, y, x = window_index
+        phase_map: ndarray = self.__map[phase]
+
+        # interpolation radius is determined from resolution, value is rounded since pixel coordinates are also indices.
+        # resolution of Pyghthouse image is 180/14 == 360/28 which is the target value after interpolation (ca. 12,86).
+        delta: int = floor((180/14) / self.__res)  # range for interpolation
+        if delta > self.__max_interp_range:
+            delta = self.__max_interp_range  # maximum range for interpolation
+
+        r: int = 0
+        g: int = 0
+        b: int = 0
 
         # scale values to map pixels, interpolate with range depending on resolution.
         interp_range_x: range = range(x - delta, x + delta + 1)
@@ -173,10 +236,10 @@ class LighthouseMap:
                 elif i_x >= self.__dim_x:
                     i_x = i_x - 360
 
-                rgb = self.__map[i_y][i_x]
-                r += rgb[0]
-                g += rgb[1]
-                b += rgb[2]
+                rgb = phase_map[i_y][i_x]
+                r += int(rgb[0])  # map may hold uint8 values, accumulate as python int to avoid overflow
+                g += int(rgb[1])
+                b += int(rgb[2])
 
         r = round(r / interp_num)
         g = round(g / interp_num)
@@ -0,0 +1,321 @@
+from contextlib import contextmanager
+from hashlib import sha1
+from multiprocessing import resource_tracker
+from multiprocessing.shared_memory import SharedMemory
+from os import stat, fstat, stat_result, remove, listdir, getpid, kill, name as os_name
+from os.path import abspath, join, isdir
+from struct import pack_into, unpack_from
+from tempfile import gettempdir
+from threading import Lock
+from time import sleep
+from typing import Callable, Iterator
+from numpy import ndarray, uint8, ascontiguousarray
+from lighthousemap import LighthouseMap
+
+try:
+    from fcntl import flock, LOCK_EX, LOCK_UN
+except ImportError:  # not available on windows, where the os frees a segment once its last handle is closed anyway
+    flock = None
+
+
+class LighthouseMapStore:
+    """
+    This class keeps loaded maps as uint8 arrays in named shared memory. Every process (worker processes as well as
+    other globe instances on the same host) that acquires the same map file attaches to the same segment instead of
+    loading its own copy, so memory stays flat when adding render workers or displays.
+
+    The segment name is derived from path, size and modification time of the map file when it is acquired. Releasing
+    uses the segment acquired before, so changing or deleting the file while it is in use does not matter.
+
+    Each segment starts with a header holding the array shape and a table of the processes using it, each with its
+    reference count. The last release unlinks the segment and removes its lock file. The table is guarded by the lock
+    file, since shared memory itself does not provide any locking.
+
+    A process that crashes without releasing its maps leaves its entry in the table. Entries of processes that no longer
+    exist are dropped whenever a segment is attached, and segments (e.g. of a map file that was replaced by a deploy)
+    whose processes all exited are unlinked whenever a new segment is created.
+
+    Arrays handed out by the store are read-only views onto the shared memory.
+    """
+    __magic: bytes = b"LHMS"
+    __max_dimensions: int = 4
+    __owner_table_offset: int = 64
+    __max_owners: int = 120
+    __header_size: int = __owner_table_offset + 8 * __max_owners
+    __shared_memory_directory: str = "/dev/shm"
+
+    __prefix: str
+    __lock: Lock
+    __segments: dict[str, SharedMemory]
+    __arrays: dict[str, ndarray]
+    __references: dict[str, int]
+    __acquired_names: dict[str, list[str]]
+
+    def __init__(self, prefix: str = "lhg"):
+        self.__prefix = prefix
+        self.__lock = Lock()
+        self.__segments = {}
+        self.__arrays = {}
+        self.__references = {}
+        self.__acquired_names = {}
+
+    def get_segment_name(self, file_name: str) -> str:
+        source: stat_result = stat(file_name)
+        key: str = "{:s}|{:d}|{:d}".format(abspath(file_name), source.st_size, source.st_mtime_ns)
+        return self.__prefix + "_" + sha1(key.encode("utf-8")).hexdigest()[:16]
+
+    def get_memory_usage(self) -> int:
+        with self.__lock:
+            return sum(segment.size for segment in self.__segments.values())
+
+    def acquire(self, file_name: str, loader: Callable[[], ndarray] | None = None) -> ndarray:
+        """
+        Gets the map for the given file as read-only array, creating the shared memory segment if no process holds it.
+
+        :param file_name: File name of the map, used to identify the segment
+        :param loader: Called to load the map if it is not yet in shared memory, defaults to parsing the PNM file
+        :return: A read-only uint8 view onto the map in shared memory
+        """
+        name: str = self.get_segment_name(file_name)
+        with self.__lock:
+            self.__acquired_names.setdefault(abspath(file_name), []).append(name)
+            if name in self.__segments:
+                self.__references[name] += 1
+                return self.__arrays[name]
+
+            try:
+                with LighthouseMapStore.__file_lock(name) as lock_file_name:
+                    segment: SharedMemory | None = LighthouseMapStore.__attach(name)
+                    created: bool = segment is None
+                    if created:
+                        if loader is None:
+                            loader = lambda: LighthouseMapStore.__load_map_file(file_name)
+                        try:
+                            segment = LighthouseMapStore.__create(name, ascontiguousarray(loader(), dtype=uint8))
+                        except BaseException:
+                            if lock_file_name is not None:
+                                remove(lock_file_name)
+                            raise
+                    else:
+                        LighthouseMapStore.__remove_dead_owners(segment)
+                    LighthouseMapStore.__change_reference_count(segment, +1)
+                if created:
+                    self.__remove_stale_segments()
+            except BaseException:
+                self.__acquired_names[abspath(file_name)].pop()
+                raise
+
+            self.__segments[name] = segment
+            self.__arrays[name] = LighthouseMapStore.__get_array_view(segment)
+            self.__references[name] = 1
+            return self.__arrays[name]
+
+    def release(self, file_name: str) -> None:
+        # the segment is looked up from the acquisition, since the file may have been changed or deleted meanwhile
+        with self.__lock:
+            names: list[str] = self.__acquired_names.get(abspath(file_name), [])
+            if not names:
+                raise ValueError("Map " + file_name + " was not acquired from this store!")
+            name: str = names.pop()
+            if name not in self.__segments:
+                return  # segment was already released by release_all
+            self.__references[name] -= 1
+            if self.__references[name] == 0:
+                self.__release_segment(name)
+
+    def release_all(self) -> None:
+        with self.__lock:
+            for name in list(self.__segments.keys()):
+                self.__release_segment(name)
+            self.__acquired_names = {}
+
+    def __release_segment(self, name: str) -> None:
+        # caller must hold the lock of this store
+        segment: SharedMemory = self.__segments.pop(name)
+        del self.__arrays[name]
+        del self.__references[name]
+        with LighthouseMapStore.__file_lock(name) as lock_file_name:
+            if LighthouseMapStore.__change_reference_count(segment, -1) == 0:
+                LighthouseMapStore.__unlink(segment, lock_file_name)
+        LighthouseMapStore.__close(segment)
+
+    def __remove_stale_segments(self) -> None:
+        # caller must hold the lock of this store; only segments of this prefix not held by this store are checked
+        if os_name != "posix" or not isdir(LighthouseMapStore.__shared_memory_directory):
+            return
+        for name in listdir(LighthouseMapStore.__shared_memory_directory):
+            if not name.startswith(self.__prefix + "_") or name in self.__segments:
+                continue
+            with LighthouseMapStore.__file_lock(name) as lock_file_name:
+                try:
+                    segment: SharedMemory = SharedMemory(name=name)
+                except FileNotFoundError:
+                    # released meanwhile, only the lock file was created again by locking
+                    if lock_file_name is not None:
+                        remove(lock_file_name)
+                    continue
+                LighthouseMapStore.__untrack(segment)
+                # while holding the lock, a segment without magic was left behind by a process that crashed creating it
+                if bytes(segment.buf[:4]) != LighthouseMapStore.__magic or \
+                        LighthouseMapStore.__remove_dead_owners(segment) == 0:
+                    print("[INFO] removed stale shared map segment", name)
+                    LighthouseMapStore.__unlink(segment, lock_file_name)
+            LighthouseMapStore.__close(segment)
+
+    @staticmethod
+    def __unlink(segment: SharedMemory, lock_file_name: str | None) -> None:
+        # caller must hold the file lock, the lock file is removed while it is still locked
+        LighthouseMapStore.__track(segment)  # unlink unregisters the segment from the resource tracker again
+        segment.unlink()
+        if lock_file_name is not None:
+            remove(lock_file_name)
+
+    @staticmethod
+    def __close(segment: SharedMemory) -> None:
+        try:
+            segment.close()
+        except BufferError:
+            pass  # arrays are still referenced somewhere, the mapping is freed once they are garbage collected
+
+    @staticmethod
+    def __load_map_file(file_name: str) -> ndarray:
+        lighthouse_map: LighthouseMap = LighthouseMap()
+        lighthouse_map.load_image(file_name)
+        return lighthouse_map.get_array()
+
+    @staticmethod
+    def __attach(name: str) -> SharedMemory | None:
+        try:
+            segment: SharedMemory = SharedMemory(name=name)
+        except FileNotFoundError:
+            return None
+        LighthouseMapStore.__untrack(segment)
+        # the header magic is written last by the creating process, wait for a segment that is still being filled
+        for _ in range(100):
+            if bytes(segment.buf[:4]) == LighthouseMapStore.__magic:
+                return segment
+            sleep(0.01)
+        segment.close()
+        raise ValueError("Shared memory segment " + name + " does not hold a map!")
+
+    @staticmethod
+    def __create(name: str, rgb_map: ndarray) -> SharedMemory:
+        if rgb_map.ndim > LighthouseMapStore.__max_dimensions:
+            raise ValueError("Maps with more than {:d} dimensions are not supported!".format(
+                LighthouseMapStore.__max_dimensions))
+        segment: SharedMemory = SharedMemory(name=name, create=True,
+                                             size=LighthouseMapStore.__header_size + rgb_map.nbytes)
+        LighthouseMapStore.__untrack(segment)
+        shape: list[int] = list(rgb_map.shape) + [0] * (LighthouseMapStore.__max_dimensions - rgb_map.ndim)
+        pack_into("<IIIII", segment.buf, 8, rgb_map.ndim, *shape)
+        # the owner table is zeroed already, since new shared memory is filled with zeros
+        target: ndarray = ndarray(rgb_map.shape, dtype=uint8, buffer=segment.buf,
+                                  offset=LighthouseMapStore.__header_size)
+        target[...] = rgb_map
+        del target  # no view may stay alive, otherwise the segment can not be closed
+        segment.buf[:4] = LighthouseMapStore.__magic
+        print("[INFO] created shared map segment", name, "with", rgb_map.nbytes, "bytes")
+        return segment
+
+    @staticmethod
+    def __get_array_view(segment: SharedMemory) -> ndarray:
+        values: tuple = unpack_from("<IIIII", segment.buf, 8)
+        shape: tuple = tuple(values[1:1 + values[0]])
+        view: ndarray = ndarray(shape, dtype=uint8, buffer=segment.buf, offset=LighthouseMapStore.__header_size)
+        view.setflags(write=False)
+        return view
+
+    @staticmethod
+    def __get_owners(segment: SharedMemory) -> list[(int, int)]:
+        return [unpack_from("<II", segment.buf, LighthouseMapStore.__owner_table_offset + 8 * slot)
+                for slot in range(LighthouseMapStore.__max_owners)]
+
+    @staticmethod
+    def __change_reference_count(segment: SharedMemory, delta: int) -> int:
+        """
+        Changes the reference count of this process in the owner table of the segment. Caller must hold the file lock.
+
+        :return: The total reference count over all processes afterwards
+        """
+        owners: list[(int, int)] = LighthouseMapStore.__get_owners(segment)
+        pid: int = getpid()
+        slots: list[int] = [slot for slot, (owner, _) in enumerate(owners) if owner == pid]
+        if not slots:
+            if delta < 0:
+                return sum(count for _, count in owners)  # e.g. a forked child releasing maps of its parent
+            slots = [slot for slot, (_, count) in enumerate(owners) if count == 0]
+            if not slots:
+                raise ValueError("Shared memory segment " + segment.name + " has no free owner slot!")
+        count: int = max(owners[slots[0]][1] + delta, 0)
+        pack_into("<II", segment.buf, LighthouseMapStore.__owner_table_offset + 8 * slots[0], pid if count else 0,
+                  count)
+        return sum(owner_count for slot, (_, owner_count) in enumerate(owners) if slot != slots[0]) + count
+
+    @staticmethod
+    def __remove_dead_owners(segment: SharedMemory) -> int:
+        """
+        Drops the references of processes that exited without releasing them. Caller must hold the file lock.
+
+        :return: The total reference count over all remaining processes
+        """
+        total_count: int = 0
+        for slot, (pid, count) in enumerate(LighthouseMapStore.__get_owners(segment)):
+            if count == 0:
+                continue
+            if LighthouseMapStore.__is_process_alive(pid):
+                total_count += count
+            else:
+                pack_into("<II", segment.buf, LighthouseMapStore.__owner_table_offset + 8 * slot, 0, 0)
+        return total_count
+
+    @staticmethod
+    def __is_process_alive(pid: int) -> bool:
+        if os_name != "posix":
+            return True  # signal 0 would terminate the process on windows, where the os frees segments anyway
+        try:
+            kill(pid, 0)
+        except ProcessLookupError:
+            return False
+        except PermissionError:
+            pass  # process exists but belongs to another user
+        return True
+
+    @staticmethod
+    def __untrack(segment: SharedMemory) -> None:
+        # the resource tracker would unlink the segment when this process exits, even if other processes still use it;
+        # the lifetime is handled by the reference count instead
+        if os_name == "posix":
+            resource_tracker.unregister(segment._name, "shared_memory")
+
+    @staticmethod
+    def __track(segment: SharedMemory) -> None:
+        if os_name == "posix":
+            resource_tracker.register(segment._name, "shared_memory")
+
+    @staticmethod
+    @contextmanager
+    def __file_lock(name: str) -> Iterator[str | None]:
+        """
+        Locks the segment with the given name across processes.
+
+        :return: Name of the lock file, which the caller may remove while holding the lock (None without file locks)
+        """
+        if flock is None:
+            yield None
+            return
+        lock_file_name: str = join(gettempdir(), name + ".lock")
+        while True:
+            lock_file = open(lock_file_name, "a")
+            flock(lock_file.fileno(), LOCK_EX)
+            try:
+                if fstat(lock_file.fileno()).st_ino == stat(lock_file_name).st_ino:
+                    break
+            except FileNotFoundError:
+                pass
+            # the file was removed by the last release while waiting for the lock, lock the file created anew
+            lock_file.close()
+        try:
+            yield lock_file_name
+        finally:
+            flock(lock_file.fileno(), LOCK_UN)
+            lock_file.close()
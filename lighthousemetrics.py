@@ -0,0 +1,219 @@
+from bisect import bisect_left
+from json import dump
+from os import replace
+from threading import Thread, Event
+from time import time
+from typing import Callable, TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from http.server import ThreadingHTTPServer
+
+
+class LighthouseCounter:
+    """
+    This class is a monotonically increasing counter that is cheap to update from the frame loop.
+    """
+    name: str
+    description: str
+    value: int
+
+    def __init__(self, name: str, description: str):
+        self.name = name
+        self.description = description
+        self.value = 0
+
+    def increment(self, value: int = 1) -> None:
+        self.value += value
+
+
+class LighthouseHistogram:
+    """
+    This class counts observed values in fixed buckets, the format used by Prometheus histograms. Observing a value is
+    a binary search and three additions, which is cheap enough to be done for every frame.
+    """
+    name: str
+    description: str
+    __buckets: list[float]
+    __counts: list[int]
+    __sum: float
+    __count: int
+
+    def __init__(self, name: str, description: str, buckets: list[float]):
+        self.name = name
+        self.description = description
+        self.__buckets = sorted(buckets)
+        self.__counts = [0] * (len(self.__buckets) + 1)  # last entry counts values above the largest bucket
+        self.__sum = 0.0
+        self.__count = 0
+
+    def observe(self, value: float) -> None:
+        self.__counts[bisect_left(self.__buckets, value)] += 1
+        self.__sum += value
+        self.__count += 1
+
+    def get_count(self) -> int:
+        return self.__count
+
+    def get_sum(self) -> float:
+        return self.__sum
+
+    def get_cumulative_buckets(self) -> list[(float, int)]:
+        cumulative: list[(float, int)] = []
+        total: int = 0
+        for bucket, count in zip(self.__buckets + [float("inf")], self.__counts):
+            total += count
+            cumulative.append((bucket, total))
+        return cumulative
+
+
+class LighthouseMetrics:
+    """
+    This class collects the metrics of a running globe and formats them for export, either in the Prometheus text format
+    or as a dictionary that can be written as JSON.
+
+    Values that change every frame are counters and histograms updated directly by the frame loop. Everything else
+    (e.g. counters of the output sinks, cache hit rates or map memory) is read by collector callbacks only when the
+    metrics are exported, so it does not cost anything in the frame loop.
+    """
+    __counters: list[LighthouseCounter]
+    __histograms: list[LighthouseHistogram]
+    __collectors: list[(str, str, str, Callable[[], float])]
+
+    def __init__(self):
+        self.__counters = []
+        self.__histograms = []
+        self.__collectors = []
+
+    def add_counter(self, name: str, description: str) -> LighthouseCounter:
+        counter: LighthouseCounter = LighthouseCounter(name, description)
+        self.__counters.append(counter)
+        return counter
+
+    def add_histogram(self, name: str, description: str, buckets: list[float]) -> LighthouseHistogram:
+        histogram: LighthouseHistogram = LighthouseHistogram(name, description, buckets)
+        self.__histograms.append(histogram)
+        return histogram
+
+    def add_collector(self, name: str, metric_type: str, description: str, collect: Callable[[], float]) -> None:
+        if metric_type not in ("counter", "gauge"):
+            raise ValueError("Metric type must be counter or gauge!")
+        self.__collectors.append((name, metric_type, description, collect))
+
+    def get_snapshot(self) -> dict[str, float | dict]:
+        snapshot: dict[str, float | dict] = {"timestamp": time()}
+        for counter in self.__counters:
+            snapshot[counter.name] = counter.value
+        for name, _, _, collect in self.__collectors:
+            snapshot[name] = collect()
+        for histogram in self.__histograms:
+            snapshot[histogram.name] = {"count": histogram.get_count(), "sum": histogram.get_sum(),
+                                        "buckets": {str(bucket): count for bucket, count
+                                                    in histogram.get_cumulative_buckets()}}
+        return snapshot
+
+    def get_prometheus_text(self) -> str:
+        lines: list[str] = []
+        for counter in self.__counters:
+            lines += ["# HELP " + counter.name + " " + counter.description, "# TYPE " + counter.name + " counter",
+                      counter.name + " " + str(counter.value)]
+        for name, metric_type, description, collect in self.__collectors:
+            lines += ["# HELP " + name + " " + description, "# TYPE " + name + " " + metric_type,
+                      name + " " + repr(float(collect()))]
+        for histogram in self.__histograms:
+            lines += ["# HELP " + histogram.name + " " + histogram.description,
+                      "# TYPE " + histogram.name + " histogram"]
+            for bucket, count in histogram.get_cumulative_buckets():
+                bucket_str: str = "+Inf" if bucket == float("inf") else repr(bucket)
+                lines.append(histogram.name + "_bucket{le=\"" + bucket_str + "\"} " + str(count))
+            lines += [histogram.name + "_sum " + repr(histogram.get_sum()),
+                      histogram.name + "_count " + str(histogram.get_count())]
+        return "\n".join(lines) + "\n"
+
+
+class LighthouseMetricsServer:
+    """
+    Serves the metrics in Prometheus text format via HTTP on a local port, from a daemon thread of its own. The http
+    server module is only imported when a server is created, since it takes a noticeable part of the startup time.
+    """
+    __server: "ThreadingHTTPServer"
+    __thread: Thread | None
+
+    def __init__(self, metrics: LighthouseMetrics, port: int, host: str = "127.0.0.1"):
+        from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+        class MetricsRequestHandler(BaseHTTPRequestHandler):
+            def do_GET(self) -> None:
+                if self.path != "/metrics":
+                    self.send_error(404)
+                    return
+                body: bytes = metrics.get_prometheus_text().encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args) -> None:
+                pass  # do not print a line for every scrape
+
+        self.__server = ThreadingHTTPServer((host, port), MetricsRequestHandler)
+        self.__server.daemon_threads = True
+        self.__thread = None
+
+    def get_port(self) -> int:
+        return self.__server.server_address[1]
+
+    def start(self) -> None:
+        self.__thread = Thread(target=self.__server.serve_forever, name="LighthouseMetricsServer", daemon=True)
+        self.__thread.start()
+        print("[INFO] serving metrics on port", self.get_port())
+
+    def stop(self) -> None:
+        if self.__thread is not None:
+            self.__server.shutdown()
+            self.__thread = None
+        self.__server.server_close()
+
+
+class LighthouseMetricsFileWriter:
+    """
+    Periodically writes a JSON snapshot of the metrics to a file. The file is replaced atomically, so a reader never
+    sees a partially written file.
+    """
+    __metrics: LighthouseMetrics
+    __file_name: str
+    __interval: float
+    __stop_event: Event
+    __thread: Thread | None
+
+    def __init__(self, metrics: LighthouseMetrics, file_name: str, interval: float = 15.0):
+        self.__metrics = metrics
+        self.__file_name = file_name
+        self.__interval = interval
+        self.__stop_event = Event()
+        self.__thread = None
+
+    def start(self) -> None:
+        self.__stop_event.clear()
+        self.__thread = Thread(target=self.__run, name="LighthouseMetricsFileWriter", daemon=True)
+        self.__thread.start()
+
+    def stop(self) -> None:
+        if self.__thread is not None:
+            self.__stop_event.set()
+            self.__thread.join()
+            self.__thread = None
+        self.write()  # final snapshot
+
+    def write(self) -> None:
+        temporary_file_name: str = self.__file_name + ".tmp"
+        with open(temporary_file_name, "wt") as file:
+            dump(self.__metrics.get_snapshot(), file, indent=2)
+        replace(temporary_file_name, self.__file_name)
+
+    def __run(self) -> None:
+        while not self.__stop_event.wait(self.__interval):
+            try:
+                self.write()
+            except OSError as e:
+                print("[WARN] could not write metrics file:", e)
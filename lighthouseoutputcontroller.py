@@ -1,37 +1,108 @@
-from login import username, token
-from pyghthouse import Pyghthouse
-
-from geometry import SphericalCoordinates
+from time import time
+from typing import TYPE_CHECKING
+from numpy import ndarray
+from geometry import EulerAngles
+from lighthouseframe import LighthouseFrame
 from lighthousemap import LighthouseMap
 from lighthousestate import LighthouseState
 from lighthousecamera import LighthouseCamera
 from lighthouserenderer import LighthouseRenderer
+from lighthousescreen import LighthouseScreen
+from lighthouseoutputsink import LighthouseOutputSink
+from lighthousestartupartifact import LighthouseStartupArtifact
+from lighthouseviewtablecache import LighthouseViewTableCache
+from lighthousescene import LighthouseScene
+
+if TYPE_CHECKING:
+    # only needed for annotations, shared memory and process pools are imported by the callers that use them
+    from lighthousemapstore import LighthouseMapStore
+    from lighthousepathplayer import LighthousePathPlayer
 
 
 class LighthouseOutputController:
     """
-    This class handles all the output generating classes as well as sending the output to the Pyghthouse api.
+    This class handles all the output generating classes as well as sending the output to a list of output sinks
+    (e.g. the Pyghthouse api, a recorder and a terminal preview). Each frame is rendered and encoded only once and then
+    fanned out to all sinks.
 
     Image creating is done in the rendering class using data held in the map class. This can in future easily be
     modified to hold a list of maps and swapping between them via a map index held by the state class.
+
+    Ray casting results are kept as view tables per camera rotation, so rays are only cast again after the view was
+    changed. The view table cache can be shared between controllers. A startup artifact can provide both the parsed map
+    and precomputed view tables.
+
+    If a map store is given, the map is acquired from shared memory, so all controllers and worker processes on the same
+    host share a single copy of it. The map is released again via release_map.
+
+    While a camera path is played, frames are taken from the path player (which renders them ahead on its workers)
+    instead of being rendered here. Once the path has finished, live rendering continues from the camera angles and
+    rotation of the last frame of the path.
+
+    If a scene is given, it is rendered instead of the single sphere. Its bodies spin and orbit with their own rates,
+    they only follow the pause of the state class.
+
+    With more than one anti-aliasing sample, the limb of the sphere is supersampled after drawing the view table. Limb
+    tables are cached like view tables.
+
+    With incremental rendering, only pixels whose window of map pixels changed since the previous frame are computed,
+    all others are copied from the previous frame. The window indices of the previous frame are reset whenever the
+    interpolation range changes.
     """
-    __pyg: Pyghthouse
+
+    __sinks: list[LighthouseOutputSink]
     __rdr: LighthouseRenderer
     __map: LighthouseMap
     __state: LighthouseState
     __rotation: float
+    __frame_index: int
+    __sinks_are_open: bool
+    __view_tables: LighthouseViewTableCache
+    __map_file_name: str
+    __map_store: "LighthouseMapStore | None"
+    __path_player: "LighthousePathPlayer | None"
+    __scene: LighthouseScene | None
+    __anti_aliasing_samples: int
+    __window_indices: list[list[tuple[int, int, int] | None]] | None
+    __computed_pixel_count: int
 
-    def __init__(self, state: LighthouseState, file_name: str, max_interpolation_range: int):
-        # Values for username and token must be provided in login.py
+    def __init__(self, state: LighthouseState, file_name: str, max_interpolation_range: int,
+                 sinks: list[LighthouseOutputSink], startup_artifact: LighthouseStartupArtifact | None = None,
+                 map_store: "LighthouseMapStore | None" = None,
+                 view_table_cache: LighthouseViewTableCache | None = None, scene: LighthouseScene | None = None):
         self.__rotation = 0
+        self.__frame_index = 0
         self.__state = state
 
-        target_frame_rate: int = self.__state.get_target_frame_rate()
-        self.__pyg = Pyghthouse(username, token, image_callback=self.draw_next_frame, frame_rate=target_frame_rate)
+        self.__sinks = list(sinks)
+        self.__sinks_are_open = False
         self.__rdr = LighthouseRenderer()
+        self.__view_tables = view_table_cache if view_table_cache is not None else LighthouseViewTableCache()
 
         self.__map = LighthouseMap()
-        self.__map.load_image(file_name)
+        self.__map_file_name = file_name
+        self.__map_store = map_store
+        self.__path_player = None
+        self.__scene = scene
+        self.__anti_aliasing_samples = 1
+        self.__window_indices = None
+        self.__computed_pixel_count = 0
+        if startup_artifact is not None and startup_artifact.is_valid_for(file_name):
+            for angles, view_table in startup_artifact.get_view_tables().items():
+                key: (int, int, float, float, float) = LighthouseViewTableCache.get_key(self.__rdr.get_dimensions(),
+                                                                                        EulerAngles(*angles))
+                self.__view_tables.put(key, view_table)
+            if map_store is not None:
+                self.__map.load_array(map_store.acquire(file_name, startup_artifact.get_map_array))
+            else:
+                self.__map.load_array(startup_artifact.get_map_array())
+        else:
+            if startup_artifact is not None:
+                print("[WARN] startup artifact is outdated for", file_name, "- loading map from file")
+            if map_store is not None:
+                self.__map.load_array(map_store.acquire(file_name))
+            else:
+                self.__map.load_image(file_name)
         self.__map.set_maximum_interpolation_range(max_interpolation_range)
 
     def __del__(self):
@@ -40,44 +111,151 @@ class LighthouseOutputController:
     def __get_camera_of_renderer(self) -> LighthouseCamera:
         return self.__rdr.get_screen().get_camera()
 
-    def __cast_rays(self) -> None:
+    def __get_view_table(self, angles: EulerAngles) -> ndarray:
+        key: (int, int, float, float, float) = LighthouseViewTableCache.get_key(self.__rdr.get_dimensions(), angles)
+        return self.__view_tables.get_or_create(key, self.__rdr.create_view_table)
+
+    def __get_limb_table(self, angles: EulerAngles) -> ndarray:
+        key: (int, int, float, float, float, int) = LighthouseViewTableCache.get_limb_key(
+            self.__rdr.get_dimensions(), angles, self.__anti_aliasing_samples)
+        return self.__view_tables.get_or_create(
+            key, lambda: self.__rdr.create_limb_table(self.__anti_aliasing_samples))
+
+    def set_anti_aliasing_samples(self, samples: int) -> None:
+        if samples < 1:
+            raise ValueError("Anti-aliasing samples must be at least 1!")
+        self.__anti_aliasing_samples = samples
+
+    def get_anti_aliasing_samples(self) -> int:
+        return self.__anti_aliasing_samples
+
+    def set_incremental_rendering(self, enabled: bool) -> None:
+        self.__window_indices = None
+        if enabled:
+            self.__reset_window_indices()
+
+    def is_incremental_rendering(self) -> bool:
+        return self.__window_indices is not None
+
+    def get_computed_pixel_count(self) -> int:
+        return self.__computed_pixel_count
+
+    def __reset_window_indices(self) -> None:
         dim_yx: (int, int) = self.__rdr.get_dimensions()
-        for y in range(dim_yx[0]):
-            for x in range(dim_yx[1]):
-                sph_coords: SphericalCoordinates = self.__rdr.cast_parallel_ray_onto_sphere(y, x)
-                # print("[DEBUG] sph_coords = " + str(sph_coords))
-                if sph_coords.is_valid():
-                    lat_rot: float = sph_coords.lat
-                    lon_rot: float = ((sph_coords.lon + 180 + round(self.__rotation)) % 360) - 180
-                    # print("[DEBUG] (x_sph, y_sph) = ({:+f}, {:+f})".format(lat_rot, lon_rot))
-                    rgb: (int, int, int) = self.__map.get_color_from_coordinate(lat_rot, lon_rot)
-                    self.__rdr.get_screen().get_current_back_frame().set_color(y, x, rgb)
-                else:
-                    self.__rdr.get_screen().get_current_back_frame().set_color(y, x, (0, 0, 0))
+        self.__window_indices = [[None] * dim_yx[1] for _ in range(dim_yx[0])]
+
+    def get_view_table_cache(self) -> LighthouseViewTableCache:
+        return self.__view_tables
+
+    def get_map_memory_usage(self) -> int:
+        return self.__map.get_array().nbytes
+
+    def release_map(self) -> None:
+        if self.__map_store is not None:
+            self.__map_store.release(self.__map_file_name)
+            self.__map_store = None
+
+    def set_maximum_interpolation_range(self, max_interpolation_range: int) -> None:
+        self.__map.set_maximum_interpolation_range(max_interpolation_range)
+        if self.__window_indices is not None:
+            self.__reset_window_indices()  # colors of all windows change with the interpolation range
+
+    def add_sink(self, sink: LighthouseOutputSink) -> None:
+        self.__sinks.append(sink)
+
+    def get_sinks(self) -> list[LighthouseOutputSink]:
+        return self.__sinks
 
     def reconnect(self) -> None:
-        self.__pyg.connect()
+        for sink in self.__sinks:
+            sink.reconnect()
 
     def disconnect(self) -> None:
-        self.__pyg.stop()
-        self.__pyg.close()
+        self.stop_camera_path()
+        for sink in self.__sinks:
+            sink.close()
+        self.__sinks_are_open = False
 
     def start_frame_rendering(self) -> None:
-        self.__pyg.start()
+        if self.__sinks_are_open:
+            return
+        for sink in self.__sinks:
+            sink.open()
+        self.__sinks_are_open = True
 
-    def stop_frame_rendering(self) -> None:
-        self.__pyg.stop()
+    def play_camera_path(self, path_player: "LighthousePathPlayer") -> None:
+        self.stop_camera_path()
+        self.__path_player = path_player
+        self.__path_player.start()
 
-    def draw_next_frame(self) -> list[list[list[int]]]:
-        self.__update_next_frame()  # could in future be run in a separate thread that works on the back frame
-        # print("[DEBUG] rot={:6.2f} img=".format(self.__rotation), self.__scr.get_current_front_frame().get())
-        return self.__rdr.get_screen().get_current_front_frame().get()
+    def stop_camera_path(self) -> None:
+        if self.__path_player is not None:
+            angles, rotation = self.__path_player.get_last_view()
+            self.__path_player.stop()
+            self.__path_player = None
+            # the live view continues from the last frame of the path instead of jumping back to where it started
+            self.__state.set_rotation_angles(angles)
+            self.__rotation = rotation
 
-    def __update_next_frame(self) -> None:
+    def is_playing_camera_path(self) -> bool:
+        return self.__path_player is not None
+
+    def draw_next_frame(self) -> LighthouseFrame:
+        if self.__path_player is not None and not self.__path_player.has_next_frame():
+            self.stop_camera_path()
+
+        frame: LighthouseFrame
+        if self.__path_player is not None:
+            frame = self.__path_player.get_next_frame(self.__frame_index)
+        else:
+            self.__update_next_frame()  # could in future be run in a separate thread that works on the back frame
+            # print("[DEBUG] rot={:6.2f} img=".format(self.__rotation), self.__scr.get_current_front_frame().get())
+            frame = LighthouseFrame.encode(self.__rdr.get_screen().get_current_front_frame(), self.__frame_index)
+        self.__send_frame(frame)
+        return frame
+
+    def advance_view(self) -> (EulerAngles, float):
+        """
+        Advances the rotation of the sphere by one frame without rendering, for frames rendered elsewhere (e.g. in a
+        worker process) and sent with send_rendered_frame.
+
+        :return: Camera angles and rotation of the sphere in degrees for the next frame
+        """
         if not self.__state.is_paused():
-            self.__rotation += self.__state.get_rotation_rate_per_frame()
-        self.__get_camera_of_renderer().set_rotation_tait_bryan_xyz(self.__state.get_rotation_angles())
-        self.__cast_rays()
-        self.__rdr.get_screen().swap_frame_buffer()
+            self.__rotation = (self.__rotation + self.__state.get_rotation_rate_per_frame()) % 360
+        return self.__state.get_rotation_angles(), self.__rotation
 
+    def send_rendered_frame(self, data: bytes) -> LighthouseFrame:
+        dim_yx: (int, int) = self.__rdr.get_dimensions()
+        frame: LighthouseFrame = LighthouseFrame(data, dim_yx[0], dim_yx[1], self.__frame_index, time())
+        self.__send_frame(frame)
+        return frame
+
+    def __send_frame(self, frame: LighthouseFrame) -> None:
+        self.__frame_index += 1
+        for sink in self.__sinks:
+            sink.send_frame(frame)
 
+    def __update_next_frame(self) -> None:
+        angles: EulerAngles = self.advance_view()[0]
+        self.__get_camera_of_renderer().set_rotation_tait_bryan_xyz(angles)
+        screen: LighthouseScreen = self.__rdr.get_screen()
+        if self.__scene is not None:
+            if not self.__state.is_paused():
+                self.__scene.advance(1.0 / self.__state.get_target_frame_rate())
+            self.__computed_pixel_count += self.__scene.render(screen, screen.get_current_back_frame())
+        elif self.__window_indices is not None:
+            self.__computed_pixel_count += self.__rdr.draw_view_table_incremental(
+                self.__get_view_table(angles), self.__map, self.__rotation, screen.get_current_back_frame(),
+                screen.get_current_front_frame(), self.__window_indices)
+        else:
+            self.__computed_pixel_count += self.__rdr.draw_view_table(self.__get_view_table(angles), self.__map,
+                                                                      self.__rotation, screen.get_current_back_frame())
+        if self.__scene is None and self.__anti_aliasing_samples > 1:
+            limb_table: ndarray = self.__get_limb_table(angles)
+            self.__computed_pixel_count += self.__rdr.draw_limb_table(limb_table, self.__map, self.__rotation,
+                                                                      screen.get_current_back_frame())
+            if self.__window_indices is not None:
+                for y, x in limb_table[:, 0].astype(int).tolist():
+                    self.__window_indices[y][x] = None  # color is a blend of samples, not of the center window
+        screen.swap_frame_buffer()
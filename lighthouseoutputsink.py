@@ -0,0 +1,176 @@
+from abc import ABC, abstractmethod
+from socket import socket, create_connection, SHUT_RDWR
+from struct import pack
+from sys import stdout
+from typing import BinaryIO, TextIO
+from lighthouseframe import LighthouseFrame
+
+
+class LighthouseOutputSink(ABC):
+    """
+    This class is the interface for everything that consumes rendered frames, e.g. the Pyghthouse api, a local
+    stand-in server, a recording file or a preview in the terminal.
+
+    The output controller encodes each frame once and hands the same LighthouseFrame object to all of its sinks, so a
+    sink must never modify the frame it receives.
+    """
+
+    def get_name(self) -> str:
+        return type(self).__name__
+
+    def open(self) -> None:
+        pass
+
+    def reconnect(self) -> None:
+        self.close()
+        self.open()
+
+    @abstractmethod
+    def send_frame(self, frame: LighthouseFrame) -> None:
+        pass
+
+    def abort(self) -> None:
+        pass  # called from another thread to wake up a blocked open or send_frame, close is called afterwards
+
+    def close(self) -> None:
+        pass
+
+
+class LighthousePyghthouseSink(LighthouseOutputSink):
+    """
+    Sends frames to the Lighthouse via the Pyghthouse api. Pyghthouse transmits the most recently set image with its
+    own frame rate, so sending a frame only replaces that image.
+    """
+    __pyg: "Pyghthouse"
+
+    def __init__(self, username: str, token: str, frame_rate: int):
+        from pyghthouse import Pyghthouse
+        self.__pyg = Pyghthouse(username, token, frame_rate=frame_rate)
+
+    def open(self) -> None:
+        self.__pyg.start()
+
+    def reconnect(self) -> None:
+        self.__pyg.connect()
+
+    def send_frame(self, frame: LighthouseFrame) -> None:
+        self.__pyg.set_image(frame.get_rgb_array())
+
+    def close(self) -> None:
+        self.__pyg.stop()
+        self.__pyg.close()
+
+
+class LighthouseServerSink(LighthouseOutputSink):
+    """
+    Sends frames via TCP to a LighthouseLocalServer (or anything speaking the same protocol). Each frame is sent as a
+    4 byte big-endian length followed by the encoded frame data.
+
+    Connecting and sending time out after the given number of seconds, so a receiver that stopped reading causes an
+    error instead of blocking the sender forever.
+    """
+    __host: str
+    __port: int
+    __timeout: float
+    __socket: socket | None
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 9000, timeout: float = 5.0):
+        self.__host = host
+        self.__port = port
+        self.__timeout = timeout
+        self.__socket = None
+
+    def open(self) -> None:
+        self.__socket = create_connection((self.__host, self.__port), timeout=self.__timeout)
+
+    def send_frame(self, frame: LighthouseFrame) -> None:
+        if self.__socket is None:
+            raise ConnectionError("Sink is not connected to {:s}:{:d}!".format(self.__host, self.__port))
+        data: bytes = frame.get_data()
+        self.__socket.sendall(pack(">I", len(data)) + data)
+
+    def abort(self) -> None:
+        connection: socket | None = self.__socket
+        if connection is not None:
+            try:
+                connection.shutdown(SHUT_RDWR)  # unlike close(), wakes up a thread blocked in sendall()
+            except OSError:
+                pass  # socket is not connected anymore
+
+    def close(self) -> None:
+        if self.__socket is not None:
+            self.__socket.close()
+            self.__socket = None
+
+
+class LighthouseFileSink(LighthouseOutputSink):
+    """
+    Records frames to a binary file. The file starts with the magic bytes b"LHGF" and the frame dimensions (y, x) as
+    two big-endian 16 bit values, followed by the raw encoded data of all frames.
+    """
+    __file_name: str
+    __file: BinaryIO | None
+
+    def __init__(self, file_name: str):
+        self.__file_name = file_name
+        self.__file = None
+
+    def open(self) -> None:
+        self.__file = open(self.__file_name, "wb")
+
+    def send_frame(self, frame: LighthouseFrame) -> None:
+        if self.__file is None:
+            raise OSError("Sink is not open for writing to {:s}!".format(self.__file_name))
+        if self.__file.tell() == 0:
+            dim_yx: (int, int) = frame.get_dimensions()
+            self.__file.write(b"LHGF" + pack(">HH", dim_yx[0], dim_yx[1]))
+        self.__file.write(frame.get_data())
+
+    def close(self) -> None:
+        if self.__file is not None:
+            self.__file.close()
+            self.__file = None
+
+
+class LighthouseTerminalSink(LighthouseOutputSink):
+    """
+    Shows a preview of the frames in an ANSI true color terminal. Two screen rows are combined into one line of text
+    using the upper half block character, so the 14x28 screen needs 7 lines of 28 characters.
+    """
+    __stream: TextIO
+    __frame_interval: int
+
+    def __init__(self, stream: TextIO = stdout, frame_interval: int = 1):
+        self.__stream = stream
+        self.__frame_interval = max(frame_interval, 1)
+
+    def open(self) -> None:
+        self.__stream.write("\x1b[2J")  # clear terminal once, later frames only move the cursor back home
+
+    def send_frame(self, frame: LighthouseFrame) -> None:
+        if frame.get_index() % self.__frame_interval != 0:
+            return
+
+        data: bytes = frame.get_data()
+        dim_yx: (int, int) = frame.get_dimensions()
+        row_length: int = dim_yx[1] * 3
+        lines: list[str] = ["\x1b[H"]
+        for y in range(0, dim_yx[0], 2):
+            top: int = y * row_length
+            bottom: int = (y + 1) * row_length if y + 1 < dim_yx[0] else -1
+            chars: list[str] = []
+            for x in range(0, row_length, 3):
+                fg: str = "\x1b[38;2;{:d};{:d};{:d}m".format(data[top + x], data[top + x + 1], data[top + x + 2])
+                if bottom >= 0:
+                    bg: str = "\x1b[48;2;{:d};{:d};{:d}m".format(data[bottom + x], data[bottom + x + 1],
+                                                                 data[bottom + x + 2])
+                else:
+                    bg = "\x1b[49m"
+                chars.append(fg + bg + "▀")
+            lines.append("".join(chars) + "\x1b[0m\n")
+        self.__stream.write("".join(lines))
+        self.__stream.flush()
+
+    def close(self) -> None:
+        self.__stream.write("\x1b[0m")
+        self.__stream.flush()
@@ -0,0 +1,95 @@
+from concurrent.futures import ProcessPoolExecutor, Future
+from time import time
+from geometry import EulerAngles
+from lighthousecamerapath import LighthouseCameraPath
+from lighthouseframe import LighthouseFrame
+from lighthousemapstore import LighthouseMapStore
+from lighthouserenderer import LighthouseRenderer
+from lighthouserenderworker import LighthouseRenderWorker
+
+
+class LighthousePathPlayer:
+    """
+    This class plays a camera path. Since the whole path is known in advance, frames are rendered ahead on a pool of
+    worker processes into a bounded look-ahead buffer, so even complex tours play at the full frame rate on slow hosts
+    as long as the workers together keep up with it.
+
+    Maps are shared with the workers via a map store, i.e. each worker attaches to the maps in shared memory instead of
+    loading its own copy.
+    """
+    __path: LighthouseCameraPath
+    __frame_rate: int
+    __look_ahead: int
+    __worker_count: int
+    __max_interpolation_range: int
+    __map_store: LighthouseMapStore
+    __pool: ProcessPoolExecutor | None
+    __pending_frames: dict[int, Future]
+    __next_index: int
+    __dim_y: int
+    __dim_x: int
+
+    def __init__(self, path: LighthouseCameraPath, frame_rate: int, max_interpolation_range: int,
+                 map_store: LighthouseMapStore, worker_count: int = 2, look_ahead_seconds: float = 2.0):
+        self.__path = path
+        self.__frame_rate = frame_rate
+        self.__look_ahead = max(int(look_ahead_seconds * frame_rate), 1)
+        self.__worker_count = worker_count
+        self.__max_interpolation_range = max_interpolation_range
+        self.__map_store = map_store
+        self.__pool = None
+        self.__pending_frames = {}
+        self.__next_index = 0
+        self.__dim_y, self.__dim_x = LighthouseRenderer().get_dimensions()
+
+    def start(self) -> None:
+        # acquiring the maps here creates the shared memory segments once, before any worker attaches to them
+        for file_name in self.__path.get_file_names():
+            self.__map_store.acquire(file_name)
+        self.__pool = ProcessPoolExecutor(max_workers=self.__worker_count,
+                                          initializer=LighthouseRenderWorker.initialize,
+                                          initargs=(self.__path.get_file_names(),))
+        self.__next_index = 0
+        self.__fill_look_ahead_buffer()
+
+    def stop(self) -> None:
+        if self.__pool is None:
+            return
+        self.__pool.shutdown(wait=True, cancel_futures=True)
+        self.__pool = None
+        self.__pending_frames = {}
+        for file_name in self.__path.get_file_names():
+            self.__map_store.release(file_name)
+
+    def has_next_frame(self) -> bool:
+        return not self.__path.is_finished_at(self.__next_index / self.__frame_rate)
+
+    def get_last_view(self) -> (EulerAngles, float):
+        """
+        Gets the view of the frame returned last, e.g. to continue with the live view once the path has finished.
+
+        :return: Camera angles and rotation of the sphere in degrees of the last frame (of the start if none was played)
+        """
+        angles, rotation, _ = self.__path.get_view_at(max(self.__next_index - 1, 0) / self.__frame_rate)
+        return angles, rotation
+
+    def get_buffered_frame_count(self) -> int:
+        return sum(1 for frame in self.__pending_frames.values() if frame.done())
+
+    def get_next_frame(self, frame_index: int) -> LighthouseFrame:
+        self.__fill_look_ahead_buffer()
+        data: bytes = self.__pending_frames.pop(self.__next_index).result()  # only waits if workers fell behind
+        self.__next_index += 1
+        self.__fill_look_ahead_buffer()
+        return LighthouseFrame(data, self.__dim_y, self.__dim_x, frame_index, time())
+
+    def __fill_look_ahead_buffer(self) -> None:
+        for index in range(self.__next_index, self.__next_index + self.__look_ahead):
+            frame_time: float = index / self.__frame_rate
+            if self.__path.is_finished_at(frame_time):
+                break
+            if index not in self.__pending_frames:
+                angles, rotation, file_name = self.__path.get_view_at(frame_time)
+                self.__pending_frames[index] = self.__pool.submit(LighthouseRenderWorker.render_frame,
+                                                                  angles.alpha, angles.beta, angles.gamma, rotation,
+                                                                  file_name, self.__max_interpolation_range)
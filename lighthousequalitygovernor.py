@@ -0,0 +1,104 @@
+from typing import Callable
+from lighthousestate import LighthouseState
+
+
+class LighthouseQualityGovernor:
+    """
+    This class adapts the rendering quality so frames are rendered within the budget given by the target frame rate of
+    the state class. Quality is given as a level between a minimum and a maximum, the meaning of a level is defined by
+    the callback that applies it (e.g. the maximum interpolation range of the map).
+
+    Render times are smoothed with an exponential moving average. To avoid oscillating between two levels, the level is
+    only lowered after several consecutive frames above the overrun threshold and only raised after a much longer run of
+    frames below the headroom threshold. After each change the streaks start again from zero and the average is seeded
+    anew from the next render time, so the old level does not count against the new one. If a raised level has to be
+    lowered again right away, the number of frames required for the next raise is doubled (up to a limit), so a host
+    that is just too slow for a level does not keep switching back and forth. Each raise that holds halves that number
+    again, down to the configured number of frames.
+    """
+    __state: LighthouseState
+    __apply_level: Callable[[int], None]
+    __level: int
+    __min_level: int
+    __max_level: int
+    __overrun_ratio: float
+    __headroom_ratio: float
+    __frames_to_lower: int
+    __frames_to_raise: int
+    __frames_to_raise_current: int
+    __frames_since_raise: int
+    __smoothing: float
+    __average_render_time: float
+    __overrun_streak: int
+    __headroom_streak: int
+
+    def __init__(self, state: LighthouseState, apply_level: Callable[[int], None], min_level: int, max_level: int,
+                 overrun_ratio: float = 0.9, headroom_ratio: float = 0.5, frames_to_lower: int = 3,
+                 frames_to_raise: int = 60, smoothing: float = 0.2):
+        if min_level > max_level:
+            raise ValueError("Minimum quality level must not exceed maximum quality level!")
+        if headroom_ratio >= overrun_ratio:
+            raise ValueError("Headroom ratio must be lower than overrun ratio for hysteresis!")
+        self.__state = state
+        self.__apply_level = apply_level
+        self.__level = max_level
+        self.__min_level = min_level
+        self.__max_level = max_level
+        self.__overrun_ratio = overrun_ratio
+        self.__headroom_ratio = headroom_ratio
+        self.__frames_to_lower = frames_to_lower
+        self.__frames_to_raise = frames_to_raise
+        self.__frames_to_raise_current = frames_to_raise
+        self.__frames_since_raise = frames_to_raise
+        self.__smoothing = smoothing
+        self.__average_render_time = -1.0
+        self.__overrun_streak = 0
+        self.__headroom_streak = 0
+
+    def get_level(self) -> int:
+        return self.__level
+
+    def get_average_render_time(self) -> float:
+        return max(self.__average_render_time, 0.0)
+
+    def report_render_time(self, render_time: float) -> None:
+        if self.__average_render_time < 0:
+            self.__average_render_time = render_time
+        else:
+            self.__average_render_time += self.__smoothing * (render_time - self.__average_render_time)
+        budget: float = 1.0 / self.__state.get_target_frame_rate()
+        self.__frames_since_raise += 1
+        if self.__frames_since_raise == self.__frames_to_raise:
+            # the last raise held, so the host may have become faster again: relax the backoff step by step
+            self.__frames_to_raise_current = max(self.__frames_to_raise_current // 2, self.__frames_to_raise)
+
+        if self.__average_render_time > self.__overrun_ratio * budget:
+            self.__overrun_streak += 1
+            self.__headroom_streak = 0
+        elif self.__average_render_time < self.__headroom_ratio * budget:
+            self.__headroom_streak += 1
+            self.__overrun_streak = 0
+        else:
+            self.__overrun_streak = 0
+            self.__headroom_streak = 0
+
+        if self.__overrun_streak >= self.__frames_to_lower and self.__level > self.__min_level:
+            self.__change_level(self.__level - 1, budget)
+        elif self.__headroom_streak >= self.__frames_to_raise_current and self.__level < self.__max_level:
+            self.__change_level(self.__level + 1, budget)
+
+    def __change_level(self, level: int, budget: float) -> None:
+        direction: str = "lowered" if level < self.__level else "raised"
+        if level > self.__level:
+            self.__frames_since_raise = 0
+        else:
+            if self.__frames_since_raise < self.__frames_to_raise:
+                self.__frames_to_raise_current = min(2 * self.__frames_to_raise_current, 16 * self.__frames_to_raise)
+            self.__frames_since_raise = self.__frames_to_raise  # only a raise that holds relaxes the backoff
+        print("[INFO] quality {:s} to level {:d} (render time {:.2f}ms, budget {:.2f}ms)".format(
+            direction, level, 1000 * self.__average_render_time, 1000 * budget))
+        self.__level = level
+        self.__apply_level(level)
+        self.__average_render_time = -1.0
+        self.__overrun_streak = 0
+        self.__headroom_streak = 0
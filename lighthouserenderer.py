@@ -1,4 +1,8 @@
+from math import isnan, sqrt
+from numpy import ndarray, full, nan, array
 from geometry import Point3d, Vector3d, Sphere3d, SphericalCoordinates
+from lighthouseimage import LighthouseImage
+from lighthousemap import LighthouseMap
 from lighthousescreen import LighthouseScreen
 
 
@@ -6,7 +10,27 @@ class LighthouseRenderer:
     """
     This class combines the screen and the "world model" (i.e. a sphere in this case) and provides a method for the
     above controller class to get a ray casting result.
+
+    Since the rays only depend on the camera, the results for a whole screen can be stored in a view table holding
+    latitude and longitude for each pixel (nan for pixels that miss the sphere). A view table only has to be recomputed
+    when the camera rotation changes. Drawing a view table fetches the map color for each pixel, with the sphere rotated
+    by the given angle around its axis.
+
+    With one ray per pixel, the limb of the sphere is stair-stepped. For anti-aliasing, a limb table holds several
+    samples for only those pixels the limb passes through. These are found from the discriminant of the ray-sphere
+    intersection, which tells how far each ray passes from the center: a pixel is on the limb if that distance differs
+    from the radius by less than half the pixel diagonal. Each entry of the limb table holds the pixel (y, x) followed
+    by latitude and longitude of each sample (nan for samples that miss the sphere). Drawing a limb table after the view
+    table replaces the color of these pixels by the average of their samples, so missing samples blend the sphere with
+    the black background by coverage. Only a small fraction of the pixels is supersampled this way.
+
+    Drawing a view table incrementally keeps the window index of map pixels each screen pixel was sampled from. Only
+    pixels whose window changed since the previous frame get a new color, all others are copied from the previous
+    frame. At slow rotation rates and near the poles, most pixels keep their window from one frame to the next. Within
+    a frame, the color of a window shared by several pixels is only computed once.
     """
+    __miss_window_index: (int, int, int) = (-1, -1, -1)
+
     __screen: LighthouseScreen
     __sphere: Sphere3d
 
@@ -27,6 +51,9 @@ class LighthouseRenderer:
         # print("[DEBUG] screen (x, y) = ({:+.1f}, {:+.1f})".format(screen_x, screen_y))
         ray: Vector3d = self.__screen.get_pixel_based_ray(screen_y, screen_x)
         # print("[DEBUG] ray = base" + str(ray.get_base()) + " -> direction" + str(ray.get_direction()))
+        return self.__cast_ray(ray)
+
+    def __cast_ray(self, ray: Vector3d) -> SphericalCoordinates:
         intersection: Point3d = self.__sphere.get_closest_intersect(ray)
         # print("[DEBUG] intersection: " + str(intersection) + " -> " + str(intersection.is_valid()))
 
@@ -35,3 +62,128 @@ class LighthouseRenderer:
         else:
             return SphericalCoordinates.invalid()
 
+    def create_view_table(self) -> ndarray:
+        dim_yx: (int, int) = self.get_dimensions()
+        view_table: ndarray = full((dim_yx[0], dim_yx[1], 2), nan)
+        for y in range(dim_yx[0]):
+            for x in range(dim_yx[1]):
+                sph_coords: SphericalCoordinates = self.cast_parallel_ray_onto_sphere(y, x)
+                if sph_coords.is_valid():
+                    view_table[y][x] = (sph_coords.lat, sph_coords.lon)
+        return view_table
+
+    def create_limb_table(self, samples: int) -> ndarray:
+        """
+        Creates the limb table for the current camera rotation.
+
+        :param samples: Number of samples per pixel along each axis, i.e. each limb pixel gets samples * samples rays
+        :return: Array with shape (limb pixels, 1 + samples * samples, 2)
+        """
+        if samples < 1:
+            raise ValueError("Anti-aliasing samples must be at least 1!")
+        res_yx: (float, float) = self.__screen.get_resolution()
+        half_diagonal: float = 0.5 * sqrt(res_yx[0] * res_yx[0] + res_yx[1] * res_yx[1])
+        radius: float = self.__sphere.radius
+        offsets: list[float] = [(i + 0.5) / samples - 0.5 for i in range(samples)]  # sample centers within pixel
+
+        dim_yx: (int, int) = self.get_dimensions()
+        limb_entries: list[list[(float, float)]] = []
+        for y in range(dim_yx[0]):
+            for x in range(dim_yx[1]):
+                ray: Vector3d = self.__screen.get_pixel_based_ray(y, x)
+                # direction is normalized, so a == 1 and the discriminant is 4 * (r^2 - distance^2)
+                distance: float = sqrt(max(radius * radius - 0.25 * self.__sphere.get_discriminant(ray), 0.0))
+                if abs(distance - radius) >= half_diagonal:
+                    continue  # pixel is either fully inside or fully outside of the sphere
+                entry: list[(float, float)] = [(y, x)]
+                for offset_y in offsets:
+                    for offset_x in offsets:
+                        sph_coords: SphericalCoordinates = self.__cast_ray(
+                            self.__screen.get_pixel_based_ray(y + offset_y, x + offset_x))
+                        entry.append((sph_coords.lat, sph_coords.lon) if sph_coords.is_valid() else (nan, nan))
+                limb_entries.append(entry)
+        return array(limb_entries, dtype=float).reshape((len(limb_entries), 1 + samples * samples, 2))
+
+    def draw_limb_table(self, limb_table: ndarray, lighthouse_map: LighthouseMap, rotation: float,
+                        image: LighthouseImage) -> int:
+        """
+        Draws a limb table over an image already holding the drawn view table.
+
+        :return: Number of limb pixels whose color was computed
+        """
+        for entry in limb_table.tolist():
+            r: int = 0
+            g: int = 0
+            b: int = 0
+            for lat, lon in entry[1:]:
+                if not isnan(lat):
+                    lon_rot: float = ((lon + 180 + rotation) % 360) - 180
+                    rgb: (int, int, int) = lighthouse_map.get_color_from_coordinate(lat, lon_rot)
+                    r += rgb[0]
+                    g += rgb[1]
+                    b += rgb[2]
+            sample_count: int = len(entry) - 1  # missing samples count as black background
+            image.set_color(int(entry[0][0]), int(entry[0][1]),
+                            (r // sample_count, g // sample_count, b // sample_count))
+        return len(limb_table)
+
+    def draw_view_table_incremental(self, view_table: ndarray, lighthouse_map: LighthouseMap, rotation: float,
+                                    image: LighthouseImage, previous_image: LighthouseImage,
+                                    window_indices: list[list[tuple[int, int, int] | None]]) -> int:
+        """
+        Draws a view table, only computing the color of pixels whose window index differs from the one given for them.
+
+        :param window_indices: Window index per pixel of the previous image (None if unknown), updated in place
+        :return: Number of pixels whose color was computed, not counting pixels missing the sphere
+        """
+        dim_yx: (int, int) = self.get_dimensions()
+        lat_lon_rows: list[list[list[float]]] = view_table.tolist()
+        computed_pixel_count: int = 0
+        window_colors: dict[(int, int, int), (int, int, int)] = {}  # pixels near the poles often share a window
+        for y in range(dim_yx[0]):
+            for x in range(dim_yx[1]):
+                lat_lon: list[float] = lat_lon_rows[y][x]
+                window_index: (int, int, int) = LighthouseRenderer.__miss_window_index
+                if not isnan(lat_lon[0]):
+                    lon_rot: float = ((lat_lon[1] + 180 + rotation) % 360) - 180
+                    window_index = lighthouse_map.get_window_index(lat_lon[0], lon_rot)
+
+                if window_index == window_indices[y][x]:
+                    image.set_color(y, x, previous_image.get_color(y, x))
+                    continue
+                window_indices[y][x] = window_index
+                if window_index == LighthouseRenderer.__miss_window_index:
+                    image.set_color(y, x, (0, 0, 0))
+                    continue
+                rgb: (int, int, int) | None = window_colors.get(window_index)
+                if rgb is None:
+                    rgb = lighthouse_map.get_color_from_window_index(window_index)
+                    window_colors[window_index] = rgb
+                    computed_pixel_count += 1
+                image.set_color(y, x, rgb)
+        return computed_pixel_count
+
+    def draw_view_table(self, view_table: ndarray, lighthouse_map: LighthouseMap, rotation: float,
+                        image: LighthouseImage) -> int:
+        """
+        Draws a view table, computing the color of every pixel that hits the sphere.
+
+        :return: Number of pixels whose color was computed, not counting pixels missing the sphere
+        """
+        dim_yx: (int, int) = self.get_dimensions()
+        lat_lon_rows: list[list[list[float]]] = view_table.tolist()
+        computed_pixel_count: int = 0
+        for y in range(dim_yx[0]):
+            for x in range(dim_yx[1]):
+                lat_lon: list[float] = lat_lon_rows[y][x]
+                # print("[DEBUG] lat_lon = " + str(lat_lon))
+                if not isnan(lat_lon[0]):
+                    lat_rot: float = lat_lon[0]
+                    lon_rot: float = ((lat_lon[1] + 180 + rotation) % 360) - 180
+                    # print("[DEBUG] (x_sph, y_sph) = ({:+f}, {:+f})".format(lat_rot, lon_rot))
+                    rgb: (int, int, int) = lighthouse_map.get_color_from_coordinate(lat_rot, lon_rot)
+                    image.set_color(y, x, rgb)
+                    computed_pixel_count += 1
+                else:
+                    image.set_color(y, x, (0, 0, 0))
+        return computed_pixel_count
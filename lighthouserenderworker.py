@@ -0,0 +1,52 @@
+from multiprocessing.util import Finalize
+from geometry import EulerAngles
+from lighthouseframe import LighthouseFrame
+from lighthouseimage import LighthouseImage
+from lighthousemap import LighthouseMap
+from lighthousemapstore import LighthouseMapStore
+from lighthouserenderer import LighthouseRenderer
+from lighthouseviewtablecache import LighthouseViewTableCache
+
+
+class LighthouseRenderWorker:
+    """
+    This class holds the state of a render worker process and its entry points, which are used as initializer and task
+    of a process pool (e.g. by the path player and the scheduler). Rendering is pure Python, so only separate processes
+    make use of more than one core.
+
+    Maps are attached from a map store, i.e. each worker uses the maps in shared memory instead of loading its own copy.
+    Each worker keeps its own renderer and view table cache. Since a worker renders for several callers, the maximum
+    interpolation range is given with every frame.
+    """
+    __renderer: LighthouseRenderer | None = None
+    __maps: dict[str, LighthouseMap] = {}
+    __view_tables: LighthouseViewTableCache | None = None
+
+    @staticmethod
+    def initialize(file_names: list[str]) -> None:
+        map_store: LighthouseMapStore = LighthouseMapStore()
+        Finalize(None, map_store.release_all, exitpriority=10)  # release the maps when the worker process exits
+
+        LighthouseRenderWorker.__renderer = LighthouseRenderer()
+        LighthouseRenderWorker.__view_tables = LighthouseViewTableCache()
+        LighthouseRenderWorker.__maps = {}
+        for file_name in file_names:
+            lighthouse_map: LighthouseMap = LighthouseMap()
+            lighthouse_map.load_array(map_store.acquire(file_name))
+            LighthouseRenderWorker.__maps[file_name] = lighthouse_map
+
+    @staticmethod
+    def render_frame(alpha: float, beta: float, gamma: float, rotation: float, file_name: str,
+                     max_interpolation_range: int) -> bytes:
+        renderer: LighthouseRenderer = LighthouseRenderWorker.__renderer
+        angles: EulerAngles = EulerAngles(alpha, beta, gamma)
+        renderer.get_screen().get_camera().set_rotation_tait_bryan_xyz(angles)
+        key: (int, int, float, float, float) = LighthouseViewTableCache.get_key(renderer.get_dimensions(), angles)
+        view_table = LighthouseRenderWorker.__view_tables.get_or_create(key, renderer.create_view_table)
+
+        lighthouse_map: LighthouseMap = LighthouseRenderWorker.__maps[file_name]
+        lighthouse_map.set_maximum_interpolation_range(max_interpolation_range)
+        dim_yx: (int, int) = renderer.get_dimensions()
+        image: LighthouseImage = LighthouseImage(dim_yx[0], dim_yx[1])
+        renderer.draw_view_table(view_table, lighthouse_map, rotation, image)
+        return LighthouseFrame.encode(image, 0).get_data()
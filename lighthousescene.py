@@ -0,0 +1,154 @@
+from math import sin, cos, pi
+from numpy import ndarray, array, full, inf, sqrt, maximum, minimum, arccos, arctan2, degrees, clip, nonzero, einsum, \
+    argsort, unique, floor, ceil
+from geometry import Point3d
+from lighthouseimage import LighthouseImage
+from lighthousemap import LighthouseMap
+from lighthousescreen import LighthouseScreen
+
+
+class LighthouseBody:
+    """
+    This class is a single sphere of a scene (e.g. a planet or a moon) with its own map, radius, position and spin.
+
+    A body may orbit a point on a circle parallel to the x-y plane, i.e. the equatorial plane of the default view.
+    Spin and orbit advance with their rates (in degrees per second) whenever the scene is advanced.
+    """
+    name: str
+    lighthouse_map: LighthouseMap
+    radius: float
+    center: Point3d
+    spin_rate: float
+    rotation: float
+    __orbit_center: Point3d | None
+    __orbit_radius: float
+    __orbit_rate: float
+    __orbit_angle: float
+
+    def __init__(self, name: str, lighthouse_map: LighthouseMap, radius: float, center: Point3d | None = None,
+                 spin_rate: float = 0.0):
+        self.name = name
+        self.lighthouse_map = lighthouse_map
+        self.radius = radius
+        self.center = center if center is not None else Point3d(0, 0, 0)
+        self.spin_rate = spin_rate
+        self.rotation = 0.0
+        self.__orbit_center = None
+        self.__orbit_radius = 0.0
+        self.__orbit_rate = 0.0
+        self.__orbit_angle = 0.0
+
+    def set_orbit(self, orbit_center: Point3d, orbit_radius: float, orbit_rate: float,
+                  orbit_angle: float = 0.0) -> None:
+        self.__orbit_center = orbit_center
+        self.__orbit_radius = orbit_radius
+        self.__orbit_rate = orbit_rate
+        self.__orbit_angle = orbit_angle
+        self.__update_orbit_position()
+
+    def advance(self, delta_time: float) -> None:
+        self.rotation = (self.rotation + self.spin_rate * delta_time) % 360
+        if self.__orbit_center is not None:
+            self.__orbit_angle = (self.__orbit_angle + self.__orbit_rate * delta_time) % 360
+            self.__update_orbit_position()
+
+    def __update_orbit_position(self) -> None:
+        angle: float = self.__orbit_angle / 180 * pi
+        self.center = self.__orbit_center + Point3d(self.__orbit_radius * cos(angle),
+                                                    self.__orbit_radius * sin(angle), 0.0)
+
+
+class LighthouseScene:
+    """
+    This class holds several bodies and renders them together, resolving for each pixel the nearest body hit.
+
+    All rays of the screen share the same direction, so rays are handled as arrays instead of one by one. Before any
+    intersection is computed, each body is culled with its bounding circle in screen space: only pixels within the box
+    around that circle are intersected with the body. The work per body therefore grows with the pixels it covers, not
+    with the size of the screen. Colors are only fetched from the map of the body that is nearest in each pixel, and
+    the pixels hit by any body are found once and grouped by body, so bodies outside the screen cost no pixel work.
+    """
+    __bodies: list[LighthouseBody]
+
+    def __init__(self, bodies: list[LighthouseBody] | None = None):
+        self.__bodies = list(bodies) if bodies is not None else []
+
+    def add_body(self, body: LighthouseBody) -> None:
+        self.__bodies.append(body)
+
+    def get_bodies(self) -> list[LighthouseBody]:
+        return self.__bodies
+
+    def advance(self, delta_time: float) -> None:
+        for body in self.__bodies:
+            body.advance(delta_time)
+
+    def render(self, screen: LighthouseScreen, image: LighthouseImage) -> int:
+        """
+        Renders all bodies as seen from the camera of the given screen into the image.
+
+        :return: Number of pixels whose color was computed, not counting pixels missing all bodies
+        """
+        bases, direction = screen.get_pixel_based_rays()
+        dim_y, dim_x = screen.get_dimensions()
+        nearest_t: ndarray = full((dim_y, dim_x), inf)
+        nearest_body: ndarray = full((dim_y, dim_x), -1)
+
+        windows: list[tuple[slice, slice] | None] = LighthouseScene.__get_bounding_windows(bases, self.__bodies)
+        for body_index, (body, window) in enumerate(zip(self.__bodies, windows)):
+            if window is None:
+                continue  # body is completely outside the screen
+            # intersect the line base + t * direction with the sphere, direction is normalized:
+            #   t^2 + 2 * b * t + c == 0  with  b = (base - center) . direction  and  c = |base - center|^2 - r^2
+            offsets: ndarray = bases[window] - (body.center.x, body.center.y, body.center.z)
+            b: ndarray = offsets @ direction
+            c: ndarray = einsum("...i,...i", offsets, offsets) - body.radius * body.radius
+            discriminant: ndarray = b * b - c
+            t: ndarray = -b - sqrt(maximum(discriminant, 0.0))  # nearer of both intersections
+            closer: ndarray = (discriminant >= 0) & (t >= 0) & (t < nearest_t[window])  # ignore hits behind camera
+            nearest_t[window][closer] = t[closer]
+            nearest_body[window][closer] = body_index
+
+        image.clear()  # pixels missing all bodies stay black
+        hit_ys, hit_xs = nonzero(nearest_body >= 0)
+        # sort the hit pixels by body, so each body gets a contiguous run of its pixels
+        order: ndarray = argsort(nearest_body[hit_ys, hit_xs], kind="stable")
+        hit_ys, hit_xs = hit_ys[order], hit_xs[order]
+        body_indices, run_starts = unique(nearest_body[hit_ys, hit_xs], return_index=True)
+        run_ends: list[int] = run_starts[1:].tolist() + [len(hit_ys)]
+        for body_index, run_start, run_end in zip(body_indices.tolist(), run_starts.tolist(), run_ends):
+            body: LighthouseBody = self.__bodies[body_index]
+            ys: ndarray = hit_ys[run_start:run_end]
+            xs: ndarray = hit_xs[run_start:run_end]
+            points: ndarray = bases[ys, xs] + nearest_t[ys, xs, None] * direction
+            p: ndarray = points - (body.center.x, body.center.y, body.center.z)
+            # same transformation as Sphere3d.get_spherical_coordinates, for all hit points of this body at once
+            lats: ndarray = -degrees(arccos(clip(p[:, 2] / body.radius, -1.0, 1.0)) - pi / 2)
+            lons: ndarray = degrees(arctan2(p[:, 1], p[:, 0]))
+            for y, x, lat, lon in zip(ys.tolist(), xs.tolist(), lats.tolist(), lons.tolist()):
+                lon_rot: float = ((lon + 180 + body.rotation) % 360) - 180
+                image.set_color(y, x, body.lighthouse_map.get_color_from_coordinate(lat, lon_rot))
+        return len(hit_ys)
+
+    @staticmethod
+    def __get_bounding_windows(bases: ndarray, bodies: list[LighthouseBody]) -> list[tuple[slice, slice] | None]:
+        if not bodies:
+            return []
+        # all rays are parallel, so the pixel grid is an affine map of the plane perpendicular to the view direction:
+        # solve for the (fractional) pixel position whose ray passes through the center of each body
+        origin: ndarray = bases[0, 0]
+        step_x: ndarray = bases[0, 1] - origin
+        step_y: ndarray = bases[1, 0] - origin
+        relative: ndarray = array([(body.center.x, body.center.y, body.center.z) for body in bodies]) - origin
+        radii: ndarray = array([body.radius for body in bodies])
+        pixel_x: ndarray = (relative @ step_x) / (step_x @ step_x)
+        pixel_y: ndarray = (relative @ step_y) / (step_y @ step_y)
+        radius_x: ndarray = radii / sqrt(step_x @ step_x)
+        radius_y: ndarray = radii / sqrt(step_y @ step_y)
+
+        y_starts: list[int] = maximum(floor(pixel_y - radius_y), 0).astype(int).tolist()
+        y_ends: list[int] = minimum(ceil(pixel_y + radius_y) + 1, bases.shape[0]).astype(int).tolist()
+        x_starts: list[int] = maximum(floor(pixel_x - radius_x), 0).astype(int).tolist()
+        x_ends: list[int] = minimum(ceil(pixel_x + radius_x) + 1, bases.shape[1]).astype(int).tolist()
+        return [(slice(y_start, y_end), slice(x_start, x_end)) if y_start < y_end and x_start < x_end else None
+                for y_start, y_end, x_start, x_end in zip(y_starts, y_ends, x_starts, x_ends)]
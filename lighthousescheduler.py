@@ -0,0 +1,214 @@
+from concurrent.futures import ProcessPoolExecutor, Future, wait, FIRST_COMPLETED
+from datetime import datetime
+from heapq import heappush, heappop
+from time import sleep, perf_counter
+from geometry import EulerAngles
+from lighthousestate import LighthouseState
+from lighthouseoutputcontroller import LighthouseOutputController
+from lighthouseoutputsink import LighthouseOutputSink
+from lighthousemapstore import LighthouseMapStore
+from lighthousequalitygovernor import LighthouseQualityGovernor
+from lighthouserenderworker import LighthouseRenderWorker
+
+
+class LighthouseScheduledGlobe:
+    """
+    This class holds everything the scheduler needs to know about one hosted globe: its own state, output controller
+    and optional quality governor as well as the frame currently being rendered, the time it was dispatched and
+    counters for skipped frames.
+    """
+    state: LighthouseState
+    oc: LighthouseOutputController
+    governor: LighthouseQualityGovernor | None
+    name: str
+    file_name: str
+    max_interpolation_range: int
+    pending_frame: Future | None
+    dispatch_time: float
+    next_deadline: float
+    frame_count: int
+    late_frame_count: int
+
+    def __init__(self, name: str, state: LighthouseState, oc: LighthouseOutputController, file_name: str,
+                 max_interpolation_range: int):
+        self.name = name
+        self.state = state
+        self.oc = oc
+        self.governor = None
+        self.file_name = file_name
+        self.max_interpolation_range = max_interpolation_range
+        self.pending_frame = None
+        self.dispatch_time = 0.0
+        self.next_deadline = 0.0
+        self.frame_count = 0
+        self.late_frame_count = 0
+
+    def get_frame_interval(self) -> float:
+        return 1.0 / self.state.get_target_frame_rate()
+
+    def set_maximum_interpolation_range(self, max_interpolation_range: int) -> None:
+        self.max_interpolation_range = max_interpolation_range
+        self.oc.set_maximum_interpolation_range(max_interpolation_range)
+
+
+class LighthouseScheduler:
+    """
+    This class drives several globes (e.g. one per installation) from a single process. Each globe has its own state,
+    output sinks and quality governor, while all maps are kept in a shared map store, so globes with the same map do
+    not load it twice.
+
+    Instead of one sleep loop per globe, the scheduler keeps the frame deadlines of all globes in a priority queue and
+    hands each due frame to a shared pool of worker processes, since rendering is pure Python and threads would share a
+    single core. The workers attach to the maps in the map store and cache view tables of their own. Finished frames
+    are sent to the sinks of their globe by the scheduler while it waits for the next deadline.
+
+    If the previous frame of a globe is still being rendered when its next deadline is reached, that frame is skipped
+    and counted as late, so a slow globe never delays the others. The governors are fed the wall time from dispatching
+    a frame until it is sent, including the time it waited for a busy pool, and every skipped deadline is reported as a
+    frame that took as long as the globe is behind. So if the pool is oversubscribed, the quality is lowered until the
+    frames of all globes fit into their deadlines again.
+    """
+    __globes: list[LighthouseScheduledGlobe]
+    __deadlines: list[(float, int, int)]
+    __worker_count: int
+    __pool: ProcessPoolExecutor | None
+    __map_store: LighthouseMapStore
+    __should_terminate: bool
+
+    def __init__(self, worker_count: int = 2, map_store: LighthouseMapStore | None = None):
+        self.__globes = []
+        self.__deadlines = []
+        self.__worker_count = worker_count
+        self.__pool = None
+        self.__map_store = map_store if map_store is not None else LighthouseMapStore()
+        self.__should_terminate = False
+
+    def get_map_store(self) -> LighthouseMapStore:
+        return self.__map_store
+
+    def get_globes(self) -> list[LighthouseScheduledGlobe]:
+        return self.__globes
+
+    def add_globe(self, name: str, state: LighthouseState, file_name: str, max_interpolation_range: int,
+                  sinks: list[LighthouseOutputSink], adaptive_quality: bool = True) -> LighthouseScheduledGlobe:
+        oc: LighthouseOutputController = LighthouseOutputController(state, file_name, max_interpolation_range, sinks,
+                                                                    map_store=self.__map_store)
+        globe: LighthouseScheduledGlobe = LighthouseScheduledGlobe(name, state, oc, file_name, max_interpolation_range)
+        if adaptive_quality:
+            globe.governor = LighthouseQualityGovernor(state, globe.set_maximum_interpolation_range,
+                                                       min_level=0, max_level=max_interpolation_range)
+        self.__globes.append(globe)
+        return globe
+
+    def schedule_termination(self) -> None:
+        self.__should_terminate = True
+
+    def run_main_loop(self) -> None:
+        heartbeat_interval_seconds: int = 15
+        start_time: float = perf_counter()
+        next_heartbeat_time: float = start_time + heartbeat_interval_seconds
+        file_names: list[str] = list(dict.fromkeys(globe.file_name for globe in self.__globes))
+        self.__pool = ProcessPoolExecutor(max_workers=self.__worker_count,
+                                          initializer=LighthouseRenderWorker.initialize, initargs=(file_names,))
+        try:
+            for index, globe in enumerate(self.__globes):
+                globe.oc.start_frame_rendering()
+                globe.next_deadline = start_time
+                heappush(self.__deadlines, (globe.next_deadline, index, index))
+
+            sequence: int = len(self.__globes)  # tie-breaker keeping equal deadlines in insertion order
+            while self.__deadlines and not self.__should_terminate:
+                deadline, _, index = heappop(self.__deadlines)
+                globe: LighthouseScheduledGlobe = self.__globes[index]
+                if globe.state.should_terminate():
+                    continue  # globe is not scheduled again
+
+                self.__send_frames_until(deadline)
+                self.__dispatch_frame(globe)
+
+                now: float = perf_counter()
+                globe.next_deadline = deadline + globe.get_frame_interval()
+                if globe.next_deadline < now:
+                    # fell behind by more than a frame, skip missed deadlines instead of rendering them in a burst
+                    missed_frames: int = int((now - globe.next_deadline) / globe.get_frame_interval()) + 1
+                    globe.late_frame_count += missed_frames
+                    globe.next_deadline += missed_frames * globe.get_frame_interval()
+                    if globe.governor is not None:
+                        for _ in range(missed_frames):
+                            globe.governor.report_render_time(now - deadline)
+                heappush(self.__deadlines, (globe.next_deadline, sequence, index))
+                sequence += 1
+
+                if now >= next_heartbeat_time:
+                    self.__print_heartbeat(now - start_time)
+                    next_heartbeat_time += heartbeat_interval_seconds
+        finally:
+            self.__pool.shutdown(wait=True, cancel_futures=True)
+            self.__pool = None
+            for globe in self.__globes:
+                globe.oc.disconnect()
+                globe.oc.release_map()
+
+    def __send_frames_until(self, deadline: float) -> None:
+        while True:
+            wait_time: float = deadline - perf_counter()
+            pending_frames: list[Future] = [globe.pending_frame for globe in self.__globes
+                                            if globe.pending_frame is not None]
+            if wait_time <= 0:
+                break
+            if not pending_frames:
+                sleep(wait_time)
+                break
+            wait(pending_frames, timeout=wait_time, return_when=FIRST_COMPLETED)
+            for globe in self.__globes:
+                if globe.pending_frame is not None and globe.pending_frame.done():
+                    self.__send_frame(globe)
+
+    def __dispatch_frame(self, globe: LighthouseScheduledGlobe) -> None:
+        if globe.pending_frame is not None:
+            if not globe.pending_frame.done():
+                globe.late_frame_count += 1
+                if globe.governor is not None:
+                    globe.governor.report_render_time(perf_counter() - globe.dispatch_time)
+                return
+            self.__send_frame(globe)
+        angles: EulerAngles
+        rotation: float
+        angles, rotation = globe.oc.advance_view()
+        globe.pending_frame = self.__pool.submit(LighthouseRenderWorker.render_frame, angles.alpha, angles.beta,
+                                                 angles.gamma, rotation, globe.file_name,
+                                                 globe.max_interpolation_range)
+        globe.dispatch_time = perf_counter()
+        globe.frame_count += 1
+
+    @staticmethod
+    def __send_frame(globe: LighthouseScheduledGlobe) -> None:
+        data: bytes = globe.pending_frame.result()  # raises any exception from rendering in the main loop
+        globe.pending_frame = None
+        globe.oc.send_rendered_frame(data)
+        if globe.governor is not None:
+            globe.governor.report_render_time(perf_counter() - globe.dispatch_time)
+
+    def __print_heartbeat(self, elapsed_time: float) -> None:
+        timestamp: str = datetime.now().strftime("%Y-%m-%d %H:%M:%S.%f")[:-3]
+        print("Heartbeat of scheduler at", timestamp, "after ", "{:.3f}s".format(elapsed_time).rjust(12))
+        for globe in self.__globes:
+            print("  {:s}: {:d} frames, {:d} late".format(globe.name, globe.frame_count, globe.late_frame_count))
+
+
+if __name__ == '__main__':
+    from lighthouseasyncsink import LighthouseAsyncSink
+    from lighthouseoutputsink import LighthouseServerSink
+
+    # example: two installations reachable via local servers on ports 9000 and 9001, both showing the same map
+    scheduler: LighthouseScheduler = LighthouseScheduler(worker_count=2)
+    for port in (9000, 9001):
+        scheduler.add_globe("globe:{:d}".format(port),
+                            LighthouseState(30, 45, rotation_rate_max=90.0),
+                            file_name="earth_contrast.pnm",
+                            max_interpolation_range=3,
+                            sinks=[LighthouseAsyncSink(LighthouseServerSink(port=port))])
+
+    scheduler.run_main_loop()
+
+    exit(0)
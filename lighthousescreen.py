@@ -1,3 +1,4 @@
+from numpy import ndarray, array, arange, stack, full_like
 from geometry import Point3d, Vector3d
 from lighthouseimage import LighthouseImage
 from lighthousecamera import LighthouseCamera
@@ -42,13 +43,17 @@ class LighthouseScreen:
     def get_dimensions(self) -> (int, int):
         return self.__dim_y, self.__dim_x
 
+    def get_resolution(self) -> (float, float):
+        return self.__res_y, self.__res_x
+
     def get_current_front_frame(self) -> LighthouseImage:
         return self.__frame_a if self.__frame_a_is_front else self.__frame_b
 
     def get_current_back_frame(self) -> LighthouseImage:
         return self.__frame_a if not self.__frame_a_is_front else self.__frame_b
 
-    def get_pixel_based_ray(self, screen_y: int, screen_x: int) -> Vector3d:
+    def get_pixel_based_ray(self, screen_y: float, screen_x: float) -> Vector3d:
+        # fractional screen coordinates give rays through a point inside the pixel, e.g. for supersampling
         x: float = screen_x * self.__res_x
         y: float = screen_y * self.__res_y
         pixel_offset: Point3d = Point3d(x, y, 0) + self.__cam.get_center()
@@ -58,6 +63,28 @@ class LighthouseScreen:
 
         return Vector3d.create_with_direction(pixel, view_direction)
 
+    def get_pixel_based_rays(self) -> (ndarray, ndarray):
+        """
+        Gets the rays of all pixels at once, which is the same as calling get_pixel_based_ray for each pixel.
+
+        :return: The base points of all rays with shape (dim_y, dim_x, 3) and the shared normalized direction
+        """
+        # rotating the unit vectors gives the columns of the rotation matrix used by the camera
+        columns: list[Point3d] = [self.__cam.get_base_point_in_current_rotation(unit) for unit in
+                                  (Point3d(1, 0, 0), Point3d(0, 1, 0), Point3d(0, 0, 1))]
+        rotation: ndarray = array([[column.x, column.y, column.z] for column in columns]).T
+
+        center: Point3d = self.__cam.get_center()
+        x: ndarray = arange(self.__dim_x) * self.__res_x + center.x
+        y: ndarray = arange(self.__dim_y) * self.__res_y + center.y
+        x_grid: ndarray = x[None, :].repeat(self.__dim_y, axis=0)
+        y_grid: ndarray = y[:, None].repeat(self.__dim_x, axis=1)
+        offsets: ndarray = stack((x_grid, y_grid, full_like(x_grid, center.z)), axis=-1)
+        bases: ndarray = offsets @ rotation.T
+
+        view_direction: Point3d = self.__cam.get_view_direction_in_current_rotation().get_normalized()
+        return bases, array([view_direction.x, view_direction.y, view_direction.z])
+
     @staticmethod
     def get_supported_dimensions() -> list[(int, int)]:
         supported_dimensions: list[(int, int)] = [(14, 28)]
@@ -0,0 +1,127 @@
+from json import dumps, loads
+from mmap import mmap, ACCESS_READ
+from os import stat, stat_result
+from numpy import ndarray, dtype, frombuffer, ascontiguousarray, uint8
+from geometry import EulerAngles
+from lighthousemap import LighthouseMap
+from lighthouserenderer import LighthouseRenderer
+
+
+class LighthouseStartupArtifact:
+    """
+    This class holds prebuilt startup data, i.e. the parsed map and the view tables for a list of camera angles, so a
+    restart does not need to parse the PNM file or cast any rays before the first frame can be sent.
+
+    The artifact file consists of a JSON header padded to a fixed size followed by the raw array data. Loading the file
+    memory maps it read-only, so the arrays are views onto the mapped file and are only paged in when accessed.
+
+    The header stores size and modification time of the source map file, which allows detecting a stale artifact.
+    """
+    __header_size: int = 4096
+    __magic: str = "LHGA1"
+
+    __file_name: str
+    __header: dict
+    __mapped_file: mmap | None
+    __rgb_map: ndarray
+    __view_tables: dict[(float, float, float), ndarray]
+
+    def __init__(self, file_name: str):
+        self.__file_name = file_name
+        self.__mapped_file = None
+        self.__view_tables = {}
+        self.__load()
+
+    def __del__(self):
+        self.close()
+
+    @staticmethod
+    def build(map_file_name: str, artifact_file_name: str, angles: list[EulerAngles]) -> None:
+        lighthouse_map: LighthouseMap = LighthouseMap()
+        lighthouse_map.load_image(map_file_name)
+        renderer: LighthouseRenderer = LighthouseRenderer()
+
+        arrays: list[(str, ndarray)] = [("map", ascontiguousarray(lighthouse_map.get_array(), dtype=uint8))]
+        for angle in angles:
+            renderer.get_screen().get_camera().set_rotation_tait_bryan_xyz(angle)
+            arrays.append((LighthouseStartupArtifact.__get_view_table_name(angle), renderer.create_view_table()))
+
+        entries: list[dict] = []
+        offset: int = LighthouseStartupArtifact.__header_size
+        for name, array in arrays:
+            entries.append({"name": name, "dtype": array.dtype.str, "shape": list(array.shape), "offset": offset})
+            offset += array.nbytes
+
+        source: stat_result = stat(map_file_name)
+        header: dict = {"magic": LighthouseStartupArtifact.__magic, "source": map_file_name,
+                        "source_size": source.st_size, "source_mtime": source.st_mtime, "arrays": entries}
+        header_bytes: bytes = dumps(header).encode("utf-8")
+        if len(header_bytes) > LighthouseStartupArtifact.__header_size:
+            raise ValueError("Too many view tables for artifact header!")
+
+        with open(artifact_file_name, "wb") as file:
+            file.write(header_bytes.ljust(LighthouseStartupArtifact.__header_size, b" "))
+            for _, array in arrays:
+                file.write(ascontiguousarray(array).tobytes())
+        print("[INFO] built startup artifact", artifact_file_name, "with", len(angles), "view tables")
+
+    def __load(self) -> None:
+        with open(self.__file_name, "rb") as file:
+            self.__mapped_file = mmap(file.fileno(), 0, access=ACCESS_READ)
+
+        self.__header = loads(self.__mapped_file[:LighthouseStartupArtifact.__header_size].decode("utf-8"))
+        if self.__header.get("magic") != LighthouseStartupArtifact.__magic:
+            raise ValueError("File " + self.__file_name + " is not a startup artifact!")
+
+        for entry in self.__header["arrays"]:
+            array_dtype: dtype = dtype(entry["dtype"])
+            shape: tuple = tuple(entry["shape"])
+            count: int = 1
+            for size in shape:
+                count *= size
+            array: ndarray = frombuffer(self.__mapped_file, dtype=array_dtype, count=count,
+                                        offset=entry["offset"]).reshape(shape)
+            if entry["name"] == "map":
+                self.__rgb_map = array
+            else:
+                self.__view_tables[LighthouseStartupArtifact.__parse_view_table_name(entry["name"])] = array
+
+    def close(self) -> None:
+        # arrays handed out before remain valid, the mapping is only released once they are garbage collected
+        self.__mapped_file = None
+        self.__view_tables = {}
+
+    def is_valid_for(self, map_file_name: str) -> bool:
+        try:
+            source: stat_result = stat(map_file_name)
+        except OSError:
+            return False
+        return (self.__header["source_size"] == source.st_size and
+                self.__header["source_mtime"] == source.st_mtime)
+
+    def get_map_array(self) -> ndarray:
+        return self.__rgb_map
+
+    def get_view_tables(self) -> dict[(float, float, float), ndarray]:
+        return self.__view_tables
+
+    @staticmethod
+    def __get_view_table_name(angles: EulerAngles) -> str:
+        return "view:{!r}:{!r}:{!r}".format(float(angles.alpha), float(angles.beta), float(angles.gamma))
+
+    @staticmethod
+    def __parse_view_table_name(name: str) -> (float, float, float):
+        parts: list[str] = name.split(":")
+        return float(parts[1]), float(parts[2]), float(parts[3])
+
+
+if __name__ == '__main__':
+    from sys import argv
+    if len(argv) != 3:
+        print("usage: python lighthousestartupartifact.py <map.pnm> <artifact file>")
+        exit(1)
+    # default equatorial view plus both polar views, matching the views reachable via the keys r and p
+    LighthouseStartupArtifact.build(argv[1], argv[2], [EulerAngles(270.0, 180.0, 0.0),
+                                                       EulerAngles(180.0, 0.0, 0.0),
+                                                       EulerAngles(0.0, 0.0, 0.0)])
+    exit(0)
@@ -0,0 +1,68 @@
+from collections import OrderedDict
+from threading import Lock
+from typing import Callable
+from numpy import ndarray
+from geometry import EulerAngles
+
+
+class LighthouseViewTableCache:
+    """
+    This class caches view tables (latitude and longitude per screen pixel) by screen dimensions and camera rotation.
+    It can be shared between several output controllers with the same screen and sphere configuration, e.g. all globes
+    driven by one scheduler, so a view is ray cast only once no matter how many globes show it.
+
+    Limb tables for anti-aliasing are cached alongside, with the number of samples appended to their key.
+
+    Entries are evicted in least recently used order once the cache is full. All methods are thread safe. A view table
+    is created outside the lock, so two threads missing the same entry at the same time may both create it.
+    """
+    __lock: Lock
+    __tables: OrderedDict
+    __max_size: int
+    __hit_count: int
+    __miss_count: int
+
+    def __init__(self, max_size: int = 64):
+        self.__lock = Lock()
+        self.__tables = OrderedDict()
+        self.__max_size = max_size
+        self.__hit_count = 0
+        self.__miss_count = 0
+
+    @staticmethod
+    def get_key(dimensions: (int, int), angles: EulerAngles) -> (int, int, float, float, float):
+        return dimensions[0], dimensions[1], float(angles.alpha), float(angles.beta), float(angles.gamma)
+
+    @staticmethod
+    def get_limb_key(dimensions: (int, int), angles: EulerAngles,
+                     samples: int) -> (int, int, float, float, float, int):
+        return LighthouseViewTableCache.get_key(dimensions, angles) + (samples,)
+
+    def get_hit_count(self) -> int:
+        return self.__hit_count
+
+    def get_miss_count(self) -> int:
+        return self.__miss_count
+
+    def get_size(self) -> int:
+        return len(self.__tables)
+
+    def put(self, key: (int, int, float, float, float), view_table: ndarray) -> None:
+        with self.__lock:
+            self.__tables[key] = view_table
+            self.__tables.move_to_end(key)
+            while len(self.__tables) > self.__max_size:
+                self.__tables.popitem(last=False)
+
+    def get_or_create(self, key: (int, int, float, float, float), create: Callable[[], ndarray]) -> ndarray:
+        with self.__lock:
+            view_table: ndarray | None = self.__tables.get(key)
+            if view_table is not None:
+                self.__tables.move_to_end(key)
+                self.__hit_count += 1
+                return view_table
+            self.__miss_count += 1
+
+        view_table = create()
+        self.put(key, view_table)
+        return view_table
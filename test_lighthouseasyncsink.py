@@ -0,0 +1,99 @@
+from time import sleep, monotonic
+from typing import Callable
+from unittest import TestCase, main
+from lighthouseasyncsink import LighthouseAsyncSink
+from lighthouseframe import LighthouseFrame
+from lighthouselocalserver import LighthouseLocalServer
+from lighthouseoutputsink import LighthouseServerSink
+
+
+def create_frame(index: int, dim_y: int = 14, dim_x: int = 28) -> LighthouseFrame:
+    return LighthouseFrame(bytes([index % 256]) * (dim_y * dim_x * 3), dim_y, dim_x, index, monotonic())
+
+
+def wait_until(condition: Callable[[], bool], timeout: float = 5.0) -> bool:
+    deadline: float = monotonic() + timeout
+    while monotonic() < deadline:
+        if condition():
+            return True
+        sleep(0.01)
+    return condition()
+
+
+class LighthouseAsyncSinkTest(TestCase):
+    """
+    Drives an async server sink against the local stand-in server, which simulates latency, outages and a receiver
+    that stopped reading.
+    """
+    server: LighthouseLocalServer
+    sink: LighthouseAsyncSink
+
+    def start(self, dim_y: int = 14, dim_x: int = 28, **sink_arguments) -> None:
+        self.server = LighthouseLocalServer(port=0, dim_y=dim_y, dim_x=dim_x)
+        self.server.start()
+        self.sink = LighthouseAsyncSink(LighthouseServerSink(port=self.server.get_port(), timeout=5.0),
+                                        backoff_initial=0.05, backoff_max=0.2, **sink_arguments)
+        self.sink.open()
+        self.addCleanup(self.server.stop)
+        self.addCleanup(self.sink.close)
+
+    def test_frames_arrive_at_server(self) -> None:
+        self.start()
+        self.assertTrue(wait_until(self.sink.is_connected))
+        for index in range(5):
+            self.sink.send_frame(create_frame(index))
+            self.assertTrue(wait_until(lambda: self.server.get_frame_count() == index + 1))
+        self.assertEqual(self.server.get_last_frame().get_data(), create_frame(4).get_data())
+        self.assertEqual(self.sink.get_dropped_frame_count(), 0)
+
+    def test_latency_drops_oldest_frames(self) -> None:
+        self.start(queue_size=2)
+        self.assertTrue(wait_until(self.sink.is_connected))
+        self.server.set_latency(0.05)
+        for index in range(50):
+            self.sink.send_frame(create_frame(index))
+        self.assertGreater(self.sink.get_dropped_frame_count(), 0)
+        self.assertLessEqual(self.sink.get_queue_depth(), 2)
+        # the newest frame is never dropped, so it is the last frame to arrive
+        self.assertTrue(wait_until(lambda: self.server.get_last_frame() is not None and
+                                   self.server.get_last_frame().get_data() == create_frame(49).get_data()))
+
+    def test_reconnects_after_outage(self) -> None:
+        self.start()
+        self.assertTrue(wait_until(self.sink.is_connected))
+        self.sink.send_frame(create_frame(0))
+        self.assertTrue(wait_until(lambda: self.server.get_frame_count() == 1))
+
+        self.server.simulate_outage(0.3)
+        index: int = 1
+        deadline: float = monotonic() + 5.0
+        while self.sink.get_reconnect_count() == 0 and monotonic() < deadline:
+            self.sink.send_frame(create_frame(index))
+            index += 1
+            sleep(0.02)
+        self.assertEqual(self.sink.get_reconnect_count(), 1)
+        self.assertGreater(self.sink.get_reconnect_time_total(), 0.0)
+
+        self.sink.send_frame(create_frame(index))
+        self.assertTrue(wait_until(lambda: self.server.get_frame_count() > 1))
+
+    def test_close_returns_while_receiver_is_stalled(self) -> None:
+        # large frames fill the socket buffers quickly while the server sleeps after the first frame
+        self.start(dim_y=256, dim_x=256)
+        self.assertTrue(wait_until(self.sink.is_connected))
+        self.server.set_latency(30.0)
+        for index in range(64):
+            self.sink.send_frame(create_frame(index, 256, 256))
+            sleep(0.005)
+        sent_frame_count: int = self.sink.get_sent_frame_count()
+        sleep(0.2)
+        self.assertEqual(self.sink.get_sent_frame_count(), sent_frame_count)  # sender is blocked in sendall
+
+        start_time: float = monotonic()
+        self.sink.close()
+        self.assertLess(monotonic() - start_time, 1.0)
+        self.assertFalse(self.sink.is_connected())
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,82 @@
+from unittest import TestCase, main
+from geometry import EulerAngles
+from lighthousecamerapath import LighthouseCameraPath, LighthouseKeyframe
+
+
+def integrate_rotation(keyframes: list[LighthouseKeyframe], time: float, steps: int = 10000) -> float:
+    # midpoint rule over the piecewise linear rotation rate, independent of the closed form used by the path
+    def get_rate(at: float) -> float:
+        for start, end in zip(keyframes, keyframes[1:]):
+            if start.time <= at <= end.time:
+                return start.rotation_rate + (end.rotation_rate - start.rotation_rate) * \
+                    (at - start.time) / (end.time - start.time)
+        return keyframes[-1].rotation_rate
+
+    step: float = time / steps
+    return sum(get_rate((index + 0.5) * step) for index in range(steps)) * step % 360
+
+
+class LighthouseCameraPathTest(TestCase):
+    """
+    Interpolates camera angles, rotation and map of paths with angles crossing 0 degrees, changing rotation rates and
+    looping.
+    """
+    def setUp(self) -> None:
+        self.keyframes: list[LighthouseKeyframe] = [
+            LighthouseKeyframe(0.0, EulerAngles(350.0, 10.0, 180.0), 0.0, "a.pnm"),
+            LighthouseKeyframe(2.0, EulerAngles(10.0, 350.0, 180.0), 90.0, "a.pnm"),
+            LighthouseKeyframe(4.0, EulerAngles(100.0, 350.0, 0.0), 30.0, "b.pnm")]
+        self.path: LighthouseCameraPath = LighthouseCameraPath(self.keyframes)
+
+    def assertAnglesAlmostEqual(self, angles: EulerAngles, expected: (float, float, float)) -> None:
+        for value, expected_value in zip((angles.alpha, angles.beta, angles.gamma), expected):
+            self.assertAlmostEqual(value, expected_value)
+
+    def test_angles_take_the_shortest_arc(self) -> None:
+        self.assertAnglesAlmostEqual(self.path.get_view_at(0.5)[0], (355.0, 5.0, 180.0))
+        self.assertAnglesAlmostEqual(self.path.get_view_at(1.0)[0], (0.0, 0.0, 180.0))
+        self.assertAnglesAlmostEqual(self.path.get_view_at(1.5)[0], (5.0, 355.0, 180.0))
+        # 180 degrees either way: the delta is normalized to -180, so gamma decreases
+        self.assertAnglesAlmostEqual(self.path.get_view_at(3.0)[0], (55.0, 350.0, 90.0))
+
+    def test_rotation_integrates_rotation_rate(self) -> None:
+        for time in (0.0, 0.5, 1.0, 2.0, 2.7, 4.0):
+            self.assertAlmostEqual(self.path.get_view_at(time)[1], integrate_rotation(self.keyframes, time),
+                                   places=4)
+        self.assertAlmostEqual(self.path.get_view_at(1.0)[1], 22.5)  # rate rises linearly from 0 to 45 in 1 second
+        self.assertAlmostEqual(self.path.get_view_at(4.0)[1], 210.0)
+
+    def test_map_switches_at_keyframe(self) -> None:
+        self.assertEqual(self.path.get_view_at(3.99)[2], "a.pnm")
+        self.assertEqual(self.path.get_view_at(4.0)[2], "b.pnm")
+        self.assertEqual(self.path.get_file_names(), ["a.pnm", "b.pnm"])
+
+    def test_path_ends_on_last_keyframe(self) -> None:
+        self.assertFalse(self.path.is_finished_at(4.0))
+        self.assertTrue(self.path.is_finished_at(4.01))
+        angles, rotation, file_name = self.path.get_view_at(10.0)
+        self.assertAnglesAlmostEqual(angles, (100.0, 350.0, 0.0))
+        self.assertAlmostEqual(rotation, 210.0)
+        self.assertEqual(file_name, "b.pnm")
+
+    def test_loop_wraps_around(self) -> None:
+        path: LighthouseCameraPath = LighthouseCameraPath(self.keyframes, loop=True)
+        self.assertFalse(path.is_finished_at(100.0))
+        for time in (0.5, 1.0, 2.7):
+            angles, rotation, file_name = path.get_view_at(time + 2 * path.get_duration())
+            expected_angles, expected_rotation, expected_file_name = self.path.get_view_at(time)
+            self.assertAnglesAlmostEqual(angles, (expected_angles.alpha, expected_angles.beta, expected_angles.gamma))
+            self.assertAlmostEqual(rotation, expected_rotation)
+            self.assertEqual(file_name, expected_file_name)
+
+    def test_keyframes_are_validated(self) -> None:
+        self.assertRaises(ValueError, LighthouseCameraPath, [])
+        self.assertRaises(ValueError, LighthouseCameraPath,
+                          [LighthouseKeyframe(1.0, EulerAngles(), 0.0, "a.pnm")])
+        # keyframes are sorted by time
+        path: LighthouseCameraPath = LighthouseCameraPath(list(reversed(self.keyframes)))
+        self.assertAlmostEqual(path.get_view_at(2.7)[1], self.path.get_view_at(2.7)[1])
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,94 @@
+from multiprocessing import get_context
+from multiprocessing.context import BaseContext
+from os import utime, remove, getpid, _exit
+from os.path import join, exists
+from tempfile import TemporaryDirectory, gettempdir
+from unittest import TestCase, main
+from numpy import ndarray, arange, uint8
+from lighthousemapstore import LighthouseMapStore
+
+
+def create_map() -> ndarray:
+    return arange(4 * 8 * 3, dtype=uint8).reshape((4, 8, 3))
+
+
+def acquire_and_crash(prefix: str, file_name: str) -> None:
+    LighthouseMapStore(prefix=prefix).acquire(file_name, create_map)
+    _exit(0)  # exits without releasing the map
+
+
+class LighthouseMapStoreTest(TestCase):
+    """
+    Acquires and releases a map in shared memory, also while the map file is changed or deleted in between or after a
+    process holding the map crashed.
+    """
+    def setUp(self) -> None:
+        directory: TemporaryDirectory = TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.file_name: str = join(directory.name, "map.pnm")
+        with open(self.file_name, "wt") as file:
+            file.write("P3\n")
+        self.prefix: str = "lhgtest{:d}".format(getpid())
+        self.store: LighthouseMapStore = LighthouseMapStore(prefix=self.prefix)
+        self.addCleanup(self.store.release_all)
+
+    def segment_exists(self, name: str) -> bool:
+        return exists(join("/dev/shm", name))
+
+    def lock_file_exists(self, name: str) -> bool:
+        return exists(join(gettempdir(), name + ".lock"))
+
+    def crash_while_holding_map(self) -> None:
+        context: BaseContext = get_context("fork")
+        process = context.Process(target=acquire_and_crash, args=(self.prefix, self.file_name))
+        process.start()
+        process.join()
+
+    def test_last_release_unlinks_segment(self) -> None:
+        name: str = self.store.get_segment_name(self.file_name)
+        self.assertTrue((self.store.acquire(self.file_name, create_map) == create_map()).all())
+        self.store.acquire(self.file_name)
+        self.store.release(self.file_name)
+        self.assertTrue(self.segment_exists(name))
+        self.store.release(self.file_name)
+        self.assertFalse(self.segment_exists(name))
+        self.assertFalse(self.lock_file_exists(name))
+        self.assertRaises(ValueError, self.store.release, self.file_name)
+
+    def test_release_after_file_was_touched(self) -> None:
+        name: str = self.store.get_segment_name(self.file_name)
+        self.store.acquire(self.file_name, create_map)
+        utime(self.file_name, (1, 1))
+        self.store.release(self.file_name)
+        self.assertFalse(self.segment_exists(name))
+
+    def test_release_after_file_was_deleted(self) -> None:
+        name: str = self.store.get_segment_name(self.file_name)
+        self.store.acquire(self.file_name, create_map)
+        remove(self.file_name)
+        self.store.release(self.file_name)
+        self.assertFalse(self.segment_exists(name))
+
+    def test_attach_drops_references_of_crashed_process(self) -> None:
+        name: str = self.store.get_segment_name(self.file_name)
+        self.crash_while_holding_map()
+        self.assertTrue(self.segment_exists(name))
+        self.store.acquire(self.file_name)
+        self.store.release(self.file_name)
+        self.assertFalse(self.segment_exists(name))
+        self.assertFalse(self.lock_file_exists(name))
+
+    def test_create_removes_segment_of_crashed_process(self) -> None:
+        # after a deploy, the map file is newer, so the segment left behind by the crash can not be attached anymore
+        stale_name: str = self.store.get_segment_name(self.file_name)
+        self.crash_while_holding_map()
+        utime(self.file_name, (1, 1))
+        name: str = self.store.get_segment_name(self.file_name)
+        self.store.acquire(self.file_name, create_map)
+        self.assertFalse(self.segment_exists(stale_name))
+        self.assertFalse(self.lock_file_exists(stale_name))
+        self.assertTrue(self.segment_exists(name))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,66 @@
+from unittest import TestCase, main
+from numpy import isnan
+from geometry import EulerAngles
+from lighthouseoutputcontroller import LighthouseOutputController
+from lighthouserenderer import LighthouseRenderer
+from lighthousestate import LighthouseState
+
+
+class LighthouseOutputControllerTest(TestCase):
+    """
+    Compares incremental rendering to rendering every pixel, which must give exactly the same frames.
+    """
+    file_name: str = "earth_contrast.pnm"
+
+    def create_controllers(self, anti_aliasing_samples: int) -> list[(LighthouseState, LighthouseOutputController)]:
+        controllers: list[(LighthouseState, LighthouseOutputController)] = []
+        for incremental_rendering in (False, True):
+            state: LighthouseState = LighthouseState(30, 10, 180)
+            oc: LighthouseOutputController = LighthouseOutputController(state, self.file_name, 3, [])
+            oc.set_anti_aliasing_samples(anti_aliasing_samples)
+            oc.set_incremental_rendering(incremental_rendering)
+            controllers.append((state, oc))
+        return controllers
+
+    def assert_incremental_frames_are_identical(self, anti_aliasing_samples: int) -> None:
+        controllers: list[(LighthouseState, LighthouseOutputController)] = self.create_controllers(
+            anti_aliasing_samples)
+        for frame_index in range(40):
+            for state, oc in controllers:
+                if frame_index == 10:
+                    state.set_rotation_angles(EulerAngles(250.0, 170.0, 30.0))  # view change
+                elif frame_index == 20:
+                    state.toggle_pause()  # while paused, incremental rendering copies every pixel
+                elif frame_index == 25:
+                    oc.set_maximum_interpolation_range(1)
+                elif frame_index == 30:
+                    state.set_rotation_angles(EulerAngles(270.0, 170.0, 0.0))
+            full_frame, incremental_frame = [oc.draw_next_frame() for _, oc in controllers]
+            self.assertEqual(full_frame.get_data(), incremental_frame.get_data(),
+                             "frame {:d} differs".format(frame_index))
+
+        full_count, incremental_count = [oc.get_computed_pixel_count() for _, oc in controllers]
+        self.assertLess(incremental_count, full_count)
+
+    def test_incremental_rendering_is_identical(self) -> None:
+        self.assert_incremental_frames_are_identical(1)
+
+    def test_incremental_rendering_with_anti_aliasing_is_identical(self) -> None:
+        self.assert_incremental_frames_are_identical(3)
+
+    def test_computed_pixels_are_counted_alike(self) -> None:
+        (_, full_oc), (_, incremental_oc) = self.create_controllers(1)
+        full_oc.draw_next_frame()
+        incremental_oc.draw_next_frame()
+        renderer: LighthouseRenderer = LighthouseRenderer()
+        angles: EulerAngles = LighthouseState(30, 10, 180).get_rotation_angles()
+        renderer.get_screen().get_camera().set_rotation_tait_bryan_xyz(angles)
+        hit_pixel_count: int = int((~isnan(renderer.create_view_table()[..., 0])).sum())
+        self.assertEqual(full_oc.get_computed_pixel_count(), hit_pixel_count)
+        # the first incremental frame computes every pixel hitting the sphere, except those sharing a window
+        self.assertLessEqual(incremental_oc.get_computed_pixel_count(), hit_pixel_count)
+        self.assertGreater(incremental_oc.get_computed_pixel_count(), 0)
+
+
+if __name__ == '__main__':
+    main()
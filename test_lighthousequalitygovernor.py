@@ -0,0 +1,54 @@
+from unittest import TestCase, main
+from lighthousequalitygovernor import LighthouseQualityGovernor
+from lighthousestate import LighthouseState
+
+
+def count_frames_until_level_changes(governor: LighthouseQualityGovernor, render_time: float,
+                                     max_frames: int = 10000) -> int:
+    level: int = governor.get_level()
+    for frame in range(1, max_frames + 1):
+        governor.report_render_time(render_time)
+        if governor.get_level() != level:
+            return frame
+    raise AssertionError("Quality level did not change within {:d} frames!".format(max_frames))
+
+
+class LighthouseQualityGovernorTest(TestCase):
+    """
+    Feeds render times far below and far above the budget of 30 frames per second to the governor.
+    """
+    fast: float = 0.001
+    slow: float = 0.1
+
+    def setUp(self) -> None:
+        self.levels: list[int] = []
+        self.governor = LighthouseQualityGovernor(LighthouseState(30, 10, 180), self.levels.append, min_level=0,
+                                                  max_level=5, frames_to_lower=3, frames_to_raise=10)
+
+    def test_lowers_and_raises_level(self) -> None:
+        self.assertEqual(count_frames_until_level_changes(self.governor, self.slow), 3)
+        self.assertEqual(self.governor.get_level(), 4)
+        self.assertEqual(count_frames_until_level_changes(self.governor, self.fast), 10)
+        self.assertEqual(self.levels, [4, 5])
+
+    def test_backoff_recovers_after_raise_that_holds(self) -> None:
+        for _ in range(3):
+            count_frames_until_level_changes(self.governor, self.slow)
+        self.assertEqual(self.governor.get_level(), 2)
+
+        # raises that are lowered again right away double the frames needed for the next raise
+        self.assertEqual(count_frames_until_level_changes(self.governor, self.fast), 10)
+        count_frames_until_level_changes(self.governor, self.slow)
+        self.assertEqual(count_frames_until_level_changes(self.governor, self.fast), 20)
+        count_frames_until_level_changes(self.governor, self.slow)
+        self.assertEqual(count_frames_until_level_changes(self.governor, self.fast), 40)
+        self.assertEqual(self.governor.get_level(), 3)
+
+        # each raise that holds halves it again, down to the configured number of frames
+        self.assertEqual(count_frames_until_level_changes(self.governor, self.fast), 20)
+        self.assertEqual(count_frames_until_level_changes(self.governor, self.fast), 10)
+        self.assertEqual(self.governor.get_level(), 5)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,78 @@
+from math import isnan
+from unittest import TestCase, main
+from numpy import ndarray, full, uint8
+from geometry import EulerAngles, Point3d, Sphere3d, SphericalCoordinates
+from lighthouseimage import LighthouseImage
+from lighthousemap import LighthouseMap
+from lighthouserenderer import LighthouseRenderer
+
+
+class LighthouseRendererLimbTableTest(TestCase):
+    """
+    Compares limb tables with the coverage of each pixel by the sphere, counted by brute force from 8x8 rays per pixel.
+    """
+    coverage_samples: int = 8
+
+    def setUp(self) -> None:
+        self.renderer: LighthouseRenderer = LighthouseRenderer()
+        self.renderer.get_screen().get_camera().set_rotation_tait_bryan_xyz(EulerAngles(30, 200, 10))
+        self.sphere: Sphere3d = Sphere3d(Point3d(0, 0, 0), 6.0)
+        self.dim_y, self.dim_x = self.renderer.get_dimensions()
+
+    def get_coverage(self, y: int, x: int) -> float:
+        offsets: list[float] = [(i + 0.5) / self.coverage_samples - 0.5 for i in range(self.coverage_samples)]
+        hits: int = sum(1 for offset_y in offsets for offset_x in offsets if self.sphere.does_intersect_line(
+            self.renderer.get_screen().get_pixel_based_ray(y + offset_y, x + offset_x)))
+        return hits / (self.coverage_samples * self.coverage_samples)
+
+    def test_partly_covered_pixels_are_on_limb(self) -> None:
+        limb_table: ndarray = self.renderer.create_limb_table(3)
+        view_table: ndarray = self.renderer.create_view_table()
+        limb_pixels: set[(int, int)] = {(int(entry[0][0]), int(entry[0][1])) for entry in limb_table}
+        for y in range(self.dim_y):
+            for x in range(self.dim_x):
+                coverage: float = self.get_coverage(y, x)
+                if 0.0 < coverage < 1.0:
+                    self.assertIn((y, x), limb_pixels)
+                elif (y, x) not in limb_pixels:
+                    # fully inside or outside, so the single ray of the view table tells the same
+                    self.assertEqual(coverage == 0.0, isnan(view_table[y][x][0]))
+        self.assertLess(len(limb_pixels), self.dim_y * self.dim_x // 2)
+
+    def test_samples_are_cast_within_pixel(self) -> None:
+        samples: int = 2
+        limb_table: ndarray = self.renderer.create_limb_table(samples)
+        self.assertEqual(limb_table.shape[1:], (1 + samples * samples, 2))
+        offsets: list[float] = [-0.25, 0.25]
+        for entry in limb_table.tolist():
+            y, x = int(entry[0][0]), int(entry[0][1])
+            expected: list[SphericalCoordinates] = [self.renderer.cast_parallel_ray_onto_sphere(y + offset_y,
+                                                                                                x + offset_x)
+                                                    for offset_y in offsets for offset_x in offsets]
+            for (lat, lon), coordinates in zip(entry[1:], expected):
+                if coordinates.is_valid():
+                    self.assertAlmostEqual(lat, coordinates.lat)
+                    self.assertAlmostEqual(lon, coordinates.lon)
+                else:
+                    self.assertTrue(isnan(lat) and isnan(lon))
+
+    def test_drawn_limb_blends_by_coverage(self) -> None:
+        samples: int = 4
+        lighthouse_map: LighthouseMap = LighthouseMap()
+        lighthouse_map.load_array(full((180, 360, 3), (200, 100, 40), dtype=uint8))
+        limb_table: ndarray = self.renderer.create_limb_table(samples)
+        image: LighthouseImage = LighthouseImage(self.dim_y, self.dim_x)
+        self.assertEqual(self.renderer.draw_limb_table(limb_table, lighthouse_map, 0.0, image), len(limb_table))
+        for entry in limb_table.tolist():
+            hits: int = sum(1 for lat, _ in entry[1:] if not isnan(lat))
+            expected: (int, int, int) = tuple(value * hits // (samples * samples) for value in (200, 100, 40))
+            color: (int, int, int) = tuple(int(value) for value in image.get_color(int(entry[0][0]),
+                                                                                   int(entry[0][1])))
+            self.assertEqual(color, expected)
+
+    def test_samples_must_be_positive(self) -> None:
+        self.assertRaises(ValueError, self.renderer.create_limb_table, 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,94 @@
+from unittest import TestCase, main
+from numpy import full, uint8
+from geometry import EulerAngles, Point3d, Vector3d, Sphere3d
+from lighthouseimage import LighthouseImage
+from lighthousemap import LighthouseMap
+from lighthousescene import LighthouseScene, LighthouseBody
+from lighthousescreen import LighthouseScreen
+
+
+def create_body(name: str, rgb: (int, int, int), radius: float, center: Point3d) -> LighthouseBody:
+    lighthouse_map: LighthouseMap = LighthouseMap()
+    lighthouse_map.load_array(full((180, 360, 3), rgb, dtype=uint8))  # single colored, so each pixel tells its body
+    return LighthouseBody(name, lighthouse_map, radius, center)
+
+
+def get_colors(image: LighthouseImage, dim_y: int, dim_x: int) -> list[list[(int, int, int)]]:
+    return [[tuple(int(value) for value in image.get_color(y, x)) for x in range(dim_x)] for y in range(dim_y)]
+
+
+class LighthouseSceneTest(TestCase):
+    """
+    Renders scenes of overlapping and partly or fully off-screen bodies and compares each pixel with a ray cast against
+    every body one by one.
+    """
+    def setUp(self) -> None:
+        self.screen: LighthouseScreen = LighthouseScreen()
+        self.screen.get_camera().set_rotation_tait_bryan_xyz(EulerAngles(30, 200, 10))
+        self.dim_y, self.dim_x = self.screen.get_dimensions()
+        _, direction = self.screen.get_pixel_based_rays()
+        self.toward_camera: Point3d = Point3d(-direction[0], -direction[1], -direction[2])
+
+    def get_expected_colors(self, bodies: list[LighthouseBody]) -> list[list[(int, int, int)]]:
+        colors: list[list[(int, int, int)]] = [[(0, 0, 0)] * self.dim_x for _ in range(self.dim_y)]
+        for y in range(self.dim_y):
+            for x in range(self.dim_x):
+                ray: Vector3d = self.screen.get_pixel_based_ray(y, x)
+                ray.normalize()
+                nearest_distance: float | None = None
+                for body in bodies:
+                    hit: Point3d = Sphere3d(body.center, body.radius).get_closest_intersect(ray)
+                    if not hit.is_valid():
+                        continue
+                    offset: Point3d = hit - ray.get_base()
+                    distance: float = offset.x * ray.get_direction().x + offset.y * ray.get_direction().y + \
+                        offset.z * ray.get_direction().z
+                    if distance >= 0 and (nearest_distance is None or distance < nearest_distance):
+                        nearest_distance = distance
+                        colors[y][x] = body.lighthouse_map.get_color_from_coordinate(0.0, 0.0)
+        return colors
+
+    def render(self, bodies: list[LighthouseBody]) -> (list[list[(int, int, int)]], int):
+        image: LighthouseImage = LighthouseImage(self.dim_y, self.dim_x)
+        count: int = LighthouseScene(bodies).render(self.screen, image)
+        return get_colors(image, self.dim_y, self.dim_x), count
+
+    def test_nearest_body_is_shown(self) -> None:
+        bodies: list[LighthouseBody] = [
+            create_body("planet", (200, 0, 0), 6.0, Point3d(0, 0, 0)),
+            create_body("moon in front", (0, 200, 0), 2.5, Point3d(0, 0, 0) + self.toward_camera.get_scaled(8.0) +
+                        Point3d(1.0, 2.0, 0.5)),
+            create_body("moon behind", (0, 0, 200), 4.0, Point3d(0, 0, 0) - self.toward_camera.get_scaled(12.0))]
+        colors, count = self.render(bodies)
+        self.assertEqual(colors, self.get_expected_colors(bodies))
+        self.assertEqual(count, sum(1 for row in colors for rgb in row if rgb != (0, 0, 0)))
+
+        shown: set[(int, int, int)] = {rgb for row in colors for rgb in row}
+        self.assertIn((0, 200, 0), shown)
+        self.assertNotIn((0, 0, 200), shown)  # completely hidden behind the planet
+
+    def test_bodies_cut_by_screen_edge_or_off_screen(self) -> None:
+        origin: Vector3d = self.screen.get_pixel_based_ray(0, 0)
+        corner: Point3d = origin.get_base() - self.toward_camera.get_scaled(4.0)
+        bodies: list[LighthouseBody] = [
+            create_body("planet", (200, 0, 0), 6.0, Point3d(0, 0, 0)),
+            create_body("cut at corner", (0, 200, 0), 3.3, corner),
+            create_body("off screen", (0, 0, 200), 2.0, Point3d(100, 100, 100))]
+        colors, count = self.render(bodies)
+        self.assertEqual(colors, self.get_expected_colors(bodies))
+        self.assertEqual(colors[0][0], (0, 200, 0))
+
+        colors_without_off_screen, count_without_off_screen = self.render(bodies[:2])
+        self.assertEqual(colors, colors_without_off_screen)
+        self.assertEqual(count, count_without_off_screen)
+
+    def test_only_off_screen_bodies(self) -> None:
+        bodies: list[LighthouseBody] = [create_body("off screen {:d}".format(index), (0, 0, 200), 2.0,
+                                                    Point3d(100 + index, 100, 100)) for index in range(50)]
+        colors, count = self.render(bodies)
+        self.assertEqual(count, 0)
+        self.assertEqual(colors, [[(0, 0, 0)] * self.dim_x for _ in range(self.dim_y)])
+
+
+if __name__ == '__main__':
+    main()
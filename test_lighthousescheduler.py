@@ -0,0 +1,38 @@
+from os.path import join, dirname, abspath
+from threading import Timer
+from unittest import TestCase, main
+from lighthousescheduler import LighthouseScheduler
+from lighthousestate import LighthouseState
+
+
+class LighthouseSchedulerTest(TestCase):
+    """
+    Runs globes on a pool with a single worker for a few seconds, once with a load the worker keeps up with and once
+    with far more frames per second than it can render at the highest quality level.
+    """
+    file_name: str = join(dirname(abspath(__file__)), "earth_contrast.pnm")
+    max_interpolation_range: int = 3
+
+    def run_globes(self, globe_count: int, frame_rate: int, duration: float) -> list[int]:
+        scheduler: LighthouseScheduler = LighthouseScheduler(worker_count=1)
+        for index in range(globe_count):
+            scheduler.add_globe("globe:{:d}".format(index), LighthouseState(frame_rate, 45, rotation_rate_max=90.0),
+                                self.file_name, self.max_interpolation_range, sinks=[])
+        timer: Timer = Timer(duration, scheduler.schedule_termination)
+        timer.start()
+        self.addCleanup(timer.cancel)
+        scheduler.run_main_loop()
+        return [globe.governor.get_level() for globe in scheduler.get_globes()]
+
+    def test_keeps_quality_while_worker_keeps_up(self) -> None:
+        self.assertEqual(self.run_globes(1, 10, 2.0), [self.max_interpolation_range])
+
+    def test_oversubscribed_pool_lowers_quality(self) -> None:
+        # the frames arrive far faster than one worker renders them, so deadlines are skipped even though the cpu time
+        # of each frame fits the budget
+        levels: list[int] = self.run_globes(4, 60, 3.0)
+        self.assertLess(min(levels), self.max_interpolation_range)
+
+
+if __name__ == '__main__':
+    main()